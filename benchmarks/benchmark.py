@@ -0,0 +1,203 @@
+# Benchmark suite for circuit construction, transpilation and simulation.
+#
+# Usage:
+#   python benchmarks/benchmark.py --output results.json
+#   python benchmarks/benchmark.py --output new.json --compare results.json
+#
+# Results are written as JSON so that runs from different revisions can be compared.
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import qiskit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from qfactor import arithmetic, gates, optimization, shors_quantum  # noqa: E402
+from qfactor.version import __version__  # noqa: E402
+
+# Default sweep of odd composite moduli which are not prime powers
+DEFAULT_MODULI = [15, 21, 33, 35]
+
+# Basis that all circuits are decomposed into before counting gates
+BASIS_GATES = ['u1', 'u2', 'u3', 'cx']
+
+# Metrics where a larger value is a regression, used when comparing runs
+COMPARED_METRICS = ['build_time', 'optimize_time', 'transpile_time', 'simulate_time', 'size',
+                    'depth', 'peak_memory_bytes']
+
+
+# Get the smallest valid base x for the modulus n
+def get_base(n):
+    for x in range(2, n):
+        if math.gcd(x, n) == 1:
+            return x
+
+
+# Call a function, returning its result, the time taken and the peak memory allocated by Python
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak_memory
+
+
+# Get the gate counts and depth of a circuit after decomposition into the basis gates
+def get_circuit_metrics(circuit):
+    decomposed = qiskit.transpile(circuit, basis_gates=BASIS_GATES, optimization_level=0)
+    return {'num_qubits': decomposed.num_qubits,
+            'size': decomposed.size(),
+            'depth': decomposed.depth(),
+            'gate_counts': dict(decomposed.count_ops())}
+
+
+# Time building, transpiling and simulating the full order-finding circuit for n
+def benchmark_order_finding(n, shots, semiclassical, approximation_degree):
+    x = get_base(n)
+    q = shors_quantum.get_q(n)
+    backend = qiskit.Aer.get_backend('qasm_simulator')
+
+    # Start from an empty gate cache so that construction is timed from scratch
+    gates.gate_cache.clear()
+    if semiclassical:
+        builder = shors_quantum.build_semiclassical_circuit
+    else:
+        builder = shors_quantum.build_circuit
+    circuit, build_time, build_memory = measure(builder, x, n, q, approximation_degree)
+    optimized_circuit, optimize_time, optimize_memory = measure(optimization.optimize_circuit,
+                                                                circuit)
+
+    transpiled_circuit, transpile_time, transpile_memory = measure(qiskit.transpile,
+                                                                   optimized_circuit, backend)
+
+    qobj = qiskit.assemble(transpiled_circuit, backend, shots=shots)
+    start = time.perf_counter()
+    backend.run(qobj).result()
+    simulate_time = time.perf_counter() - start
+
+    return {'name': 'order_finding',
+            'n': n,
+            'x': x,
+            'semiclassical': semiclassical,
+            'approximation_degree': approximation_degree,
+            'shots': shots,
+            'num_qubits': circuit.num_qubits,
+            'build_time': build_time,
+            'optimize_time': optimize_time,
+            'transpile_time': transpile_time,
+            'simulate_time': simulate_time,
+            'size': transpiled_circuit.size(),
+            'depth': transpiled_circuit.depth(),
+            'peak_memory_bytes': max(build_memory, optimize_memory, transpile_memory),
+            'statevector_bytes': 16 * 2 ** circuit.num_qubits,
+            'gate_cache': gates.gate_cache.get_stats()}
+
+
+# Build one of the gate classes and record its construction time, size and depth
+def benchmark_gate(circuit_class, *args, approximation_degree=None):
+    gates.gate_cache.clear()
+    circuit, build_time, peak_memory = measure(circuit_class, *args, approximation_degree)
+    result = {'name': circuit_class.__name__,
+              'args': list(args),
+              'approximation_degree': approximation_degree,
+              'build_time': build_time,
+              'peak_memory_bytes': peak_memory}
+    result.update(get_circuit_metrics(circuit))
+    return result
+
+
+# Run every benchmark for each modulus
+def run_benchmarks(moduli, shots, semiclassical, approximation_degree):
+    results = []
+    for n in moduli:
+        print(f'Benchmarking n = {n}...', file=sys.stderr)
+
+        n_base_qubits = arithmetic.get_min_n_bits_for_modulus(n)
+        n_exponent_qubits = arithmetic.get_min_n_bits_for_modulus(shors_quantum.get_q(n))
+        x = get_base(n)
+
+        results.append(benchmark_gate(gates.QFT, n_exponent_qubits,
+                                      approximation_degree=approximation_degree))
+        results.append(benchmark_gate(gates.CCModularFixedQFTAdder, n_base_qubits, x, n,
+                                      approximation_degree=approximation_degree))
+        results.append(benchmark_gate(gates.CModularFixedMultiplier, n_base_qubits, x, n,
+                                      approximation_degree=approximation_degree))
+        results.append(benchmark_gate(gates.ModularFixedExponentiator, n_exponent_qubits,
+                                      n_base_qubits, x, n,
+                                      approximation_degree=approximation_degree))
+        results.append(benchmark_order_finding(n, shots, semiclassical, approximation_degree))
+
+    return {'qfactor_version': __version__,
+            'qiskit_version': qiskit.__version__,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'max_rss_kilobytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'results': results}
+
+
+# Identify a benchmark result independently of its measurements
+def get_result_key(result):
+    return (result['name'], json.dumps(result.get('args', result.get('n'))),
+            result.get('semiclassical'), result['approximation_degree'])
+
+
+# Print the ratio of each compared metric between a baseline run and the current run
+def compare(baseline, current):
+    baseline_results = {get_result_key(result): result for result in baseline['results']}
+    print(f'{"benchmark":<50} {"metric":<18} {"baseline":>12} {"current":>12} {"ratio":>8}')
+    for result in current['results']:
+        baseline_result = baseline_results.get(get_result_key(result))
+        if baseline_result is None:
+            continue
+        label = f'{result["name"]}{tuple(result.get("args", [result.get("n")]))}'
+        for metric in COMPARED_METRICS:
+            if metric not in result or metric not in baseline_result:
+                continue
+            old_value = baseline_result[metric]
+            new_value = result[metric]
+            ratio = new_value / old_value if old_value else math.inf
+            print(f'{label:<50} {metric:<18} {old_value:>12.4g} {new_value:>12.4g}'
+                  + f' {ratio:>8.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark circuit construction, transpilation and simulation.')
+    parser.add_argument('--n', type=int, nargs='+', default=DEFAULT_MODULI,
+                        help='moduli to benchmark')
+    parser.add_argument('--shots', type=int, default=1, help='shots per simulation')
+    parser.add_argument('--semiclassical', action='store_true',
+                        help='benchmark the semi-classical QFT circuit')
+    parser.add_argument('--approximation-degree', type=int, default=None,
+                        help='drop QFT rotations R_k with k above this value')
+    parser.add_argument('--output', help='file to write the JSON results to (default: stdout)')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against')
+    arguments = parser.parse_args()
+
+    results = run_benchmarks(arguments.n, arguments.shots, arguments.semiclassical,
+                             arguments.approximation_degree)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,7 @@
-from .factoring import factorize
+from .asynchronous import factorize_async, get_order_async
+from .budget import Budget, BudgetExhausted
+from .circuit_cache import disable_circuit_cache, enable_circuit_cache
+from .factoring import factorize, factorize_completely, factorize_many
+from .resources import estimate_resources
+from .result_cache import disable_result_cache, enable_result_cache
+from .version import __version__
@@ -0,0 +1,49 @@
+import math
+
+
+# Get the minimum number of bits needed to represent
+# any non-negative integer less than the modulus given.
+def get_min_n_bits_for_modulus(modulus):
+    if modulus == 1:
+        return 1
+    else:
+        return math.ceil(math.log2(modulus))
+
+
+# Get the minimum number of bits needed to represent the given value
+def get_min_n_bits_for_value(value):
+    return get_min_n_bits_for_modulus(value + 1)
+
+
+# Check whether an R_k rotation is kept under the given approximation degree.
+# Rotations with k greater than the approximation degree are dropped; None keeps every rotation.
+def is_rotation_kept(k, approximation_degree):
+    return approximation_degree is None or k <= approximation_degree
+
+
+# Euclidean algorithm for finding modular inverse of a relative to n (such that a * a^-1 % n == 1).
+# Adapted from:
+# https://en.wikipedia.org/w/index.php?title=Extended_Euclidean_algorithm&oldid=949971910
+def get_modular_inverse(a, n):
+    t = 0
+    new_t = 1
+    r = n
+    new_r = a
+
+    while new_r != 0:
+        q = r // new_r
+        t, new_t = (new_t, t - q * new_t)
+        r, new_r = (new_r, r - q * new_r)
+
+    if r > 1:
+        raise ValueError(f'{a} is not invertible relative to {n}')
+
+    if t < 0:
+        t += n
+
+    return t
+
+
+# Get the least common multiple of two positive integers (math.lcm needs Python 3.9)
+def get_lcm(a, b):
+    return a * b // math.gcd(a, b)
@@ -0,0 +1,72 @@
+import asyncio
+import concurrent.futures
+import functools
+
+from .backends import get_backend
+from .cancellation import CancellationToken, call_with_token
+from .factoring import factorize
+
+# Executor shared by all asynchronous calls that are not given one, created when first needed
+default_executor = None
+
+
+# Factor a number as factorize() does, without blocking the event loop.
+# Circuit construction and simulation run in a thread of the given executor (the shared default
+# executor if None). If the timeout (in seconds) passes first, asyncio.TimeoutError is raised.
+# When the awaiting task is cancelled or times out, the call itself stops at its next checkpoint:
+# between attempts with different values of x and between simulations of the circuit. Worker
+# processes used when n_workers is greater than 1 are then terminated.
+async def factorize_async(n, p_min=0.95, approximation_degree=None, n_workers=None, backend=None,
+                          simulation_method=None, budget=None, batch_size=None, timeout=None,
+                          executor=None):
+    return await run_in_executor(functools.partial(factorize, n, p_min, approximation_degree,
+                                                   n_workers, backend, simulation_method, budget,
+                                                   batch_size),
+                                 timeout, executor)
+
+
+# Get the order of x relative to n with the given backend and options (see
+# backends.get_backend()) without blocking the event loop, with the same timeout and cancellation
+# behavior as factorize_async()
+async def get_order_async(x, n, backend=None, timeout=None, executor=None, **options):
+    backend = get_backend(backend, **options)
+    return await run_in_executor(functools.partial(backend.get_order, x, n), timeout, executor)
+
+
+# Run a function in a thread of the executor, cancelling it at its next checkpoint if the awaiting
+# task is cancelled or the timeout passes first
+async def run_in_executor(function, timeout=None, executor=None):
+    token = CancellationToken(timeout)
+    if executor is None:
+        executor = get_executor()
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, functools.partial(call_with_token, token, function))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except TimeoutError as error:
+        # The deadline may also be noticed first by the call itself. Before Python 3.11, this is
+        # not the same exception as the one raised by asyncio.wait_for().
+        if isinstance(error, asyncio.TimeoutError):
+            raise
+        raise asyncio.TimeoutError(str(error)) from error
+    finally:
+        # Stop the call if it is still running, which has no effect once it has finished
+        token.cancel()
+
+
+# Get the executor shared by asynchronous calls, creating it if needed
+def get_executor():
+    global default_executor
+    if default_executor is None:
+        default_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='qfactor')
+    return default_executor
+
+
+# Shut down the shared executor, waiting for the calls already running in it to finish if wait is
+# True. A new executor is created by the next asynchronous call.
+def shutdown_executor(wait=True):
+    global default_executor
+    if default_executor is not None:
+        default_executor.shutdown(wait)
+        default_executor = None
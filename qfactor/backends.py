@@ -0,0 +1,139 @@
+import math
+
+from .instrumentation import emit
+from .shors_quantum import get_order, get_orders
+
+
+# Base class of the backends which find the order of x relative to n for Shor's algorithm.
+# Subclasses implement get_order(x, n) for integers n > 2 and 2 <= x < n coprime to n, and may
+# implement get_orders(pairs) to find the orders for several (x, n) pairs more efficiently at once.
+# Backends are sent to worker processes when attempts run in parallel, so they must be picklable.
+class OrderFindingBackend:
+    def get_order(self, x, n):
+        raise NotImplementedError
+
+    def get_orders(self, pairs):
+        return [self.get_order(x, n) for x, n in pairs]
+
+    def __repr__(self):
+        options = ', '.join(f'{key}={value!r}' for key, value in vars(self).items())
+        return f'{type(self).__name__}({options})'
+
+
+# Find the order by simulating the full quantum circuit with Qiskit (see shors_quantum.get_order
+# for the options)
+class QiskitBackend(OrderFindingBackend):
+    def __init__(self, shots=8, semiclassical=False, approximation_degree=None,
+                 backend_name='qasm_simulator', n_exponent_bits=None, simulation_method=None,
+                 n_threads=None):
+        self.shots = shots
+        self.semiclassical = semiclassical
+        self.approximation_degree = approximation_degree
+        self.backend_name = backend_name
+        self.n_exponent_bits = n_exponent_bits
+        self.simulation_method = simulation_method
+        self.n_threads = n_threads
+
+    def get_order(self, x, n):
+        return get_order(x, n, self.shots, 'aer', self.semiclassical, self.approximation_degree,
+                         self.backend_name, self.n_exponent_bits, self.simulation_method,
+                         self.n_threads)
+
+    # The circuits for all of the pairs are simulated together in single Aer jobs
+    def get_orders(self, pairs):
+        return get_orders(pairs, self.shots, 'aer', self.semiclassical, self.approximation_degree,
+                          self.backend_name, self.n_exponent_bits, self.simulation_method,
+                          self.n_threads)
+
+
+# Find the order by sampling the exact distribution of the measured values with NumPy
+# (see numpy_simulator), without simulating the circuit itself
+class NumpyBackend(OrderFindingBackend):
+    def __init__(self, shots=8, n_exponent_bits=None):
+        self.shots = shots
+        self.n_exponent_bits = n_exponent_bits
+
+    def get_order(self, x, n):
+        return get_order(x, n, self.shots, 'numpy', n_exponent_bits=self.n_exponent_bits)
+
+    def get_orders(self, pairs):
+        return get_orders(pairs, self.shots, 'numpy', n_exponent_bits=self.n_exponent_bits)
+
+
+# Find the order classically with the baby-step giant-step algorithm, in O(sqrt(n)) time and
+# memory. This is a reference oracle for testing and load-testing the classical parts of Shor's
+# algorithm without any simulation.
+class ClassicalBackend(OrderFindingBackend):
+    def get_order(self, x, n):
+        emit('order_finding_started', x=x, n=n, q=None)
+        r = find_order_classically(x, n)
+        emit('order_found', x=x, n=n, r=r, simulations=0, candidates=0)
+        return r
+
+
+# Backends that can be selected by name, with their default options
+BACKENDS = {'aer': QiskitBackend,
+            'numpy': NumpyBackend,
+            'classical': ClassicalBackend}
+
+# Options of the Aer simulation of the circuit, which the other named backends accept and ignore
+# since they do not simulate the circuit. This lets the same options of factorize() be used with
+# every backend.
+SIMULATION_OPTIONS = ('semiclassical', 'approximation_degree', 'backend_name', 'simulation_method',
+                      'n_threads')
+
+
+# Get a backend from its name in BACKENDS, creating it with the given options.
+# Backend instances are returned unchanged, and None gives the default Qiskit backend.
+# Options in SIMULATION_OPTIONS are ignored by the backends other than the Qiskit backend.
+def get_backend(backend=None, **options):
+    if backend is None:
+        backend = 'aer'
+
+    if isinstance(backend, OrderFindingBackend):
+        if options:
+            raise ValueError(f'Options cannot be given for a backend instance; found {options}'
+                             + ' instead')
+        return backend
+
+    if backend not in BACKENDS:
+        raise ValueError(f'Backend must be one of {tuple(BACKENDS)} or an OrderFindingBackend;'
+                         + f' found {backend} instead')
+
+    if BACKENDS[backend] is not QiskitBackend:
+        options = {key: value for key, value in options.items()
+                   if key not in SIMULATION_OPTIONS}
+
+    return BACKENDS[backend](**options)
+
+
+# Get the order of x relative to n with the baby-step giant-step algorithm.
+# That is, find the smallest integer r > 0 such that x ** r % n == 1.
+def find_order_classically(x, n):
+    # Ensure that n is a valid integer
+    if n % 1 != 0 or n < 2:
+        raise ValueError(f'n must be an integer greater than 1; found {n} instead')
+
+    # Ensure that x has an order relative to n
+    if x % 1 != 0 or math.gcd(x, n) != 1:
+        raise ValueError(f'x must be an integer coprime to n; found {x} instead')
+
+    # The order is at most n - 1, so it can be written as i * m + j with 0 <= i <= m and
+    # 1 <= j <= m
+    m = math.isqrt(n - 1) + 1
+
+    # Baby steps: remember the smallest j with x ** j % n equal to each value
+    baby_steps = {}
+    value = 1
+    for j in range(1, m + 1):
+        value = value * x % n
+        baby_steps.setdefault(value, j)
+
+    # Giant steps: x ** (i * m + j) % n == 1 exactly when x ** j % n == x ** (-i * m) % n.
+    # The first i with a match gives the smallest order.
+    giant_step = pow(x, -m, n)
+    value = 1
+    for i in range(m + 1):
+        if value in baby_steps:
+            return i * m + baby_steps[value]
+        value = value * giant_step % n
@@ -0,0 +1,207 @@
+import contextlib
+import threading
+import time
+
+# Budget of the factorization running in each thread (see budget_scope)
+state = threading.local()
+
+
+# Raised within a budget scope when one of the limits of the budget is reached. When raised by
+# factorize() or factorize_completely(), it also carries the report of the budget (see
+# Budget.get_report) and, for factorize_completely(), the partial result: the prime factors found
+# and the composite factors that were not split, each as a sorted list.
+class BudgetExhausted(Exception):
+    def __init__(self, message, report=None, prime_factors=None, composite_factors=None):
+        super().__init__(message)
+        self.report = report
+        self.prime_factors = prime_factors
+        self.composite_factors = composite_factors
+
+
+# Limits on the compute spent on a factorization: wall time in seconds, number of circuit
+# simulations, total number of shots over all simulations and number of attempts with different
+# values of x. Limits which are None are not enforced. The resources used so far are counted as
+# the factorization runs, and the budget also records whether it was exhausted and the confidence
+# that n is prime reached by Shor's algorithm (see get_report).
+class Budget:
+    def __init__(self, max_seconds=None, max_simulations=None, max_shots=None, max_attempts=None):
+        # Ensure that the wall time is a valid number of seconds
+        if max_seconds is not None and not max_seconds > 0:
+            raise ValueError('Maximum wall time must be a positive number of seconds or None;'
+                             + f' found {max_seconds} instead')
+
+        # Ensure that the counts are valid integers
+        for name, limit in (('simulations', max_simulations), ('shots', max_shots),
+                            ('attempts', max_attempts)):
+            if limit is not None and (limit % 1 != 0 or limit < 0):
+                raise ValueError(f'Maximum number of {name} must be a non-negative integer or'
+                                 + f' None; found {limit} instead')
+
+        self.max_seconds = max_seconds
+        self.max_simulations = max_simulations
+        self.max_shots = max_shots
+        self.max_attempts = max_attempts
+        self.simulations = 0
+        self.shots = 0
+        self.attempts = 0
+        self.confidence = 0
+        self.exhausted_limit = None
+        self._start_time = None
+        self._reserved_simulations = 0
+        self._reserved_shots = 0
+
+    # Start the clock, unless it is already running
+    def start(self):
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+
+    # Get the wall time in seconds since the clock was started
+    def get_elapsed_seconds(self):
+        if self._start_time is None:
+            return 0
+        return time.monotonic() - self._start_time
+
+    # Get the wall time in seconds left before the limit, or None if there is no limit
+    def get_remaining_seconds(self):
+        if self.max_seconds is None:
+            return None
+        return max(self.max_seconds - self.get_elapsed_seconds(), 0)
+
+    # Check whether any limit has been reached
+    def is_exhausted(self):
+        return self.exhausted_limit is not None
+
+    # Raise BudgetExhausted if the wall time has run out
+    def check(self):
+        if self.max_seconds is not None and self.get_elapsed_seconds() >= self.max_seconds:
+            self._exhaust('seconds')
+
+    # Count a simulation with the given number of shots, raising BudgetExhausted instead if it
+    # would exceed the budget
+    def charge_simulation(self, shots):
+        self.check()
+        if self.max_simulations is not None and self.simulations + 1 > self.max_simulations:
+            self._exhaust('simulations')
+        if self.max_shots is not None and self.shots + shots > self.max_shots:
+            self._exhaust('shots')
+        self.simulations += 1
+        self.shots += shots
+
+    # Count an attempt with a new value of x, raising BudgetExhausted instead if it would exceed
+    # the budget
+    def charge_attempt(self):
+        self.check()
+        if self.max_attempts is not None and self.attempts + 1 > self.max_attempts:
+            self._exhaust('attempts')
+        self.attempts += 1
+
+    # Reserve a share of the simulations and shots that are neither used nor already reserved for
+    # work run elsewhere, such as in a worker process, split evenly between the given number of
+    # parts still to be reserved. Returns a new budget limited to the share and the remaining wall
+    # time, raising BudgetExhausted instead if nothing is left to share. The resources used by the
+    # work are then added with release().
+    def reserve(self, n_parts=1):
+        self.check()
+        shares = []
+        for limit, maximum, used, reserved in (
+                ('simulations', self.max_simulations, self.simulations,
+                 self._reserved_simulations),
+                ('shots', self.max_shots, self.shots, self._reserved_shots)):
+            if maximum is None:
+                shares.append(None)
+                continue
+            unreserved = maximum - used - reserved
+            if unreserved <= 0:
+                self._exhaust(limit)
+            # Round up, so that the last part takes whatever is left
+            shares.append(-(-unreserved // n_parts))
+        max_simulations, max_shots = shares
+
+        self._reserved_simulations += max_simulations or 0
+        self._reserved_shots += max_shots or 0
+        return Budget(self.get_remaining_seconds(), max_simulations, max_shots)
+
+    # Count the resources used within a budget returned by reserve(), releasing the rest of its
+    # share
+    def release(self, budget):
+        self._reserved_simulations -= budget.max_simulations or 0
+        self._reserved_shots -= budget.max_shots or 0
+        self.simulations += budget.simulations
+        self.shots += budget.shots
+
+    # Get a dictionary of whether the budget was exhausted (and which limit was reached), the
+    # confidence reached and the resources used
+    def get_report(self):
+        return {'exhausted': self.is_exhausted(),
+                'exhausted_limit': self.exhausted_limit,
+                'confidence': self.confidence,
+                'elapsed_seconds': self.get_elapsed_seconds(),
+                'simulations': self.simulations,
+                'shots': self.shots,
+                'attempts': self.attempts}
+
+    # Record that the given limit was reached and stop the factorization
+    def _exhaust(self, limit):
+        if self.exhausted_limit is None:
+            self.exhausted_limit = limit
+        raise BudgetExhausted(f'Budget of {limit} exhausted')
+
+
+# Charge the resources used by all code within the block in this thread to the given budget (or
+# none if it is None), starting its clock
+@contextlib.contextmanager
+def budget_scope(budget):
+    previous_budget = getattr(state, 'budget', None)
+    if budget is not None:
+        budget.start()
+    state.budget = budget
+    try:
+        yield budget
+    finally:
+        state.budget = previous_budget
+
+
+# Get the budget of the factorization running in this thread, or None if there is none
+def get_budget():
+    return getattr(state, 'budget', None)
+
+
+# Count a simulation with the given number of shots against the budget running in this thread, if
+# any (see Budget.charge_simulation)
+def charge_simulation(shots):
+    budget = get_budget()
+    if budget is not None:
+        budget.charge_simulation(shots)
+
+
+# Count an attempt with a new value of x against the budget running in this thread, if any (see
+# Budget.charge_attempt)
+def charge_attempt():
+    budget = get_budget()
+    if budget is not None:
+        budget.charge_attempt()
+
+
+# Reserve a share of the budget running in this thread for work run elsewhere (see
+# Budget.reserve), or return None if there is no budget
+def reserve_budget(n_parts=1):
+    budget = get_budget()
+    if budget is None:
+        return None
+    return budget.reserve(n_parts)
+
+
+# Raise BudgetExhausted if the wall time of the budget running in this thread has run out
+def check_budget():
+    budget = get_budget()
+    if budget is not None:
+        budget.check()
+
+
+# Get the wall time in seconds left in the budget running in this thread, or None if there is no
+# limit
+def get_remaining_seconds():
+    budget = get_budget()
+    if budget is None:
+        return None
+    return budget.get_remaining_seconds()
@@ -0,0 +1,97 @@
+import concurrent.futures
+import contextlib
+import queue
+import threading
+import time
+
+# Seconds between checks for cancellation while waiting for results from worker processes
+POLL_INTERVAL = 0.1
+
+# Token of the cancellable call running in each thread (see cancellation_scope)
+state = threading.local()
+
+
+# Signal that a running call should stop, either on request or once a deadline has passed.
+# Long-running code checks for this between expensive steps (see check_cancelled), so a call stops
+# at its next checkpoint rather than immediately.
+class CancellationToken:
+    def __init__(self, timeout=None):
+        # Ensure that the timeout is a valid number of seconds
+        if timeout is not None and not timeout > 0:
+            raise ValueError('Timeout must be a positive number of seconds or None;'
+                             + f' found {timeout} instead')
+
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._cancelled = threading.Event()
+
+    # Request that the call stops at its next checkpoint
+    def cancel(self):
+        self._cancelled.set()
+
+    # Check whether the call was cancelled or its deadline has passed
+    def is_cancelled(self):
+        return self._cancelled.is_set() or self.is_expired()
+
+    # Check whether the deadline has passed
+    def is_expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    # Raise concurrent.futures.CancelledError if the call was cancelled, or TimeoutError if its
+    # deadline has passed
+    def check(self):
+        if self._cancelled.is_set():
+            raise concurrent.futures.CancelledError('Call was cancelled')
+        if self.is_expired():
+            raise TimeoutError('Deadline of the call was exceeded')
+
+
+# Make the given token the one checked by check_cancelled() in this thread within the block
+@contextlib.contextmanager
+def cancellation_scope(token):
+    previous_token = getattr(state, 'token', None)
+    state.token = token
+    try:
+        yield token
+    finally:
+        state.token = previous_token
+
+
+# Get the token of the cancellable call running in this thread, or None if there is none
+def get_cancellation_token():
+    return getattr(state, 'token', None)
+
+
+# Checkpoint for long-running code: raise if the call running in this thread was cancelled or has
+# exceeded its deadline (see CancellationToken.check), and do nothing outside of any call
+def check_cancelled():
+    token = get_cancellation_token()
+    if token is not None:
+        token.check()
+
+
+# Call a function within a cancellation scope for the given token, unless the token was already
+# cancelled (e.g. while the call was waiting for a thread)
+def call_with_token(token, function, *args, **kwargs):
+    with cancellation_scope(token):
+        token.check()
+        return function(*args, **kwargs)
+
+
+# Wait for the next item of a queue filled by other threads or processes, checking for
+# cancellation while waiting. If a timeout in seconds is given and passes first, queue.Empty is
+# raised.
+def get_from_queue(items, timeout=None):
+    if get_cancellation_token() is None:
+        return items.get(timeout=timeout)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        check_cancelled()
+        wait = POLL_INTERVAL
+        if deadline is not None:
+            wait = min(wait, max(deadline - time.monotonic(), 0))
+        try:
+            return items.get(timeout=wait)
+        except queue.Empty:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise
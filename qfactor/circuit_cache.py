@@ -0,0 +1,139 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Default location of the on-disk cache
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'qfactor', 'circuits')
+
+
+# Persistent cache of circuits in a local directory, with one pickle file per circuit.
+# The total size of the files is bounded, and the least recently used files are evicted first.
+# Files are written atomically, so several processes can share the same directory.
+class CircuitCache:
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_size_bytes=2 ** 28):
+        if max_size_bytes % 1 != 0 or max_size_bytes < 0:
+            raise ValueError('Cache size must be a non-negative integer number of bytes;'
+                             + f' found {max_size_bytes} instead')
+
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # Get the circuit stored under the given key, or None if there is none
+    def get(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as file:
+                circuit = pickle.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # The file is unreadable, e.g. because it was written by incompatible code.
+            # Treat it as missing and remove it.
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Mark the file as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        self.hits += 1
+        return circuit
+
+    # Store a circuit under the given key, then evict old circuits if the cache is too large
+    def put(self, key, circuit):
+        # Write to a temporary file first so that readers never see a partial file
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                pickle.dump(circuit, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self._get_path(key))
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+
+        self._evict()
+
+    # Remove all stored circuits
+    def clear(self):
+        for path, size, last_used in self._list_files():
+            self._remove(path)
+
+    # Get the total size in bytes of all stored circuits
+    def get_size(self):
+        return sum(size for path, size, last_used in self._list_files())
+
+    # Get the hit/miss statistics and current size of the cache
+    def get_stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size_bytes': self.get_size(),
+                'max_size_bytes': self.max_size_bytes}
+
+    # Remove the least recently used files until the total size is within the bound
+    def _evict(self):
+        files = sorted(self._list_files(), key=lambda file: file[2])
+        total_size = sum(size for path, size, last_used in files)
+        for path, size, last_used in files:
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+            self.evictions += 1
+
+    # List the (path, size, last used time) of every stored circuit
+    def _list_files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process in the meantime
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    # Get the file path for a key. Keys are hashed so that any tuple of values can be used.
+    def _get_path(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, digest + '.pickle')
+
+    # Remove a file if it still exists
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Cache used by the order-finding circuits, or None if caching is disabled (the default)
+default_cache = None
+
+
+# Enable the on-disk circuit cache for all subsequent order-finding circuits
+def enable_circuit_cache(directory=DEFAULT_DIRECTORY, max_size_bytes=2 ** 28):
+    global default_cache
+    default_cache = CircuitCache(directory, max_size_bytes)
+    return default_cache
+
+
+# Disable the on-disk circuit cache. Stored circuits are kept on disk.
+def disable_circuit_cache():
+    global default_cache
+    default_cache = None
+
+
+# Get the cache used by the order-finding circuits, or None if caching is disabled
+def get_circuit_cache():
+    return default_cache
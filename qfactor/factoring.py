@@ -1,8 +1,71 @@
-from .shors_classical import run_shors_algorithm
+import math
+import queue
 
+from .budget import budget_scope, BudgetExhausted
+from .cancellation import get_from_queue
+from .primality import is_prime
+from .result_cache import get_result_cache
+from .shors_classical import create_pool, run_shors_algorithm
 
-# Factor a number into two smaller numbers or return None if prime
-def factorize(n, p_min=0.95):
+
+# Factor a number into two smaller numbers or return None if prime.
+# The approximation degree is passed on to the quantum circuits (see gates.QFT), n_workers sets
+# the number of processes running Shor's algorithm in parallel, and the backend selects how
+# orders are found (see run_shors_algorithm and backends.get_backend). The simulation method
+# overrides the one chosen automatically for the Aer simulation (see simulation.py), and
+# batch_size sets the number of attempts whose orders are found together (see
+# run_shors_algorithm).
+# Primes are recognized before Shor's algorithm runs (see factorize_classically), so it is only run
+# for composite numbers, and is repeated until it finds factors rather than stopping at a
+# confidence of p_min that n is prime.
+# If a budget is given (see budget.Budget), Shor's algorithm stops once it is exhausted, and unless
+# factors were found by then, BudgetExhausted is raised with the report of the budget: the
+# confidence that n is prime reached and the resources used.
+def factorize(n, p_min=0.95, approximation_degree=None, n_workers=None, backend=None,
+              simulation_method=None, budget=None, batch_size=None):
+    # Handle the cases which do not need the quantum computer
+    is_factored, factors = factorize_classically(n)
+    if is_factored:
+        return factors
+
+    # From here, it is guaranteed that n is an odd composite integer
+    # and is not an integer power higher than 1 of a prime
+
+    # Execute Shor's algorithm for n until it succeeds
+    with budget_scope(budget):
+        while factors is None and not (budget is not None and budget.is_exhausted()):
+            factors = find_factors(n, p_min, approximation_degree, n_workers, backend,
+                                   simulation_method, batch_size)
+
+    if factors is None and budget is not None and budget.is_exhausted():
+        raise BudgetExhausted(f'Budget of {budget.exhausted_limit} exhausted before {n} was'
+                              + ' factored', budget.get_report())
+    return factors
+
+
+# Run Shor's algorithm for n, unless factors of n were found before and are in the result cache
+# (see result_cache). Factors found are stored there if it is enabled. Failures are not stored,
+# since they only mean that n is probably prime, which is decided in factorize_classically()
+# anyway.
+def find_factors(n, p_min=0.95, approximation_degree=None, n_workers=None, backend=None,
+                 simulation_method=None, batch_size=None):
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        factors = result_cache.get_factors(n)
+        if factors is not None:
+            return factors
+
+    factors = run_shors_algorithm(n, p_min, approximation_degree, n_workers, backend,
+                                  simulation_method, batch_size)
+    if result_cache is not None and factors is not None:
+        result_cache.put_factors(n, factors)
+    return factors
+
+
+# Validate n and factor it if that can be done without Shor's algorithm.
+# Returns an (is_factored, factors) pair, where factors is as returned by factorize() and is only
+# meaningful if is_factored is True.
+def factorize_classically(n):
     # Ensure that n is an integer
     if n % 1 != 0:
         raise ValueError(f'Input must be an integer; found {n} instead')
@@ -13,25 +76,167 @@ def factorize(n, p_min=0.95):
 
     # Two is a special case as the only even prime number
     if n == 2:
-        return None
+        return (True, None)
 
     # Otherwise, if n is even, factoring is nearly trivial
     elif n % 2 == 0:
-        return (2, n // 2)
+        return (True, (2, n // 2))
+
+    # Primes are recognized without running any circuits (see primality.is_prime)
+    if is_prime(n):
+        return (True, None)
 
     # Handle the case of an integer power of an integer
     integer_root = find_integer_root(n)
     if integer_root is not None:
-        return (integer_root, n // integer_root)
+        return (True, (integer_root, n // integer_root))
 
-    # From here, it is guaranteed that n is an odd integer greater than 1
-    # and is not an integer power higher than 1 of a prime
+    return (False, None)
+
+
+# Decompose a number into its prime factors, returned as a sorted list.
+# Each factor found is checked for primality before any circuit is built for it, and composite
+# factors are split again. Since they are known to be composite, Shor's algorithm is repeated
+# until it succeeds rather than stopping at a confidence of p_min. The factors of each
+# intermediate cofactor are memoized, so repeated cofactors (such as the two halves of a square)
+# are only split once.
+# If a budget is given (see budget.Budget) and it is exhausted while some factors are still
+# composite, BudgetExhausted is raised with the report of the budget, the prime factors found and
+# the composite factors that were not split.
+def factorize_completely(n, p_min=0.95, approximation_degree=None, n_workers=None, backend=None,
+                         simulation_method=None, budget=None, batch_size=None):
+    # Factors found for each intermediate cofactor, as returned by factorize_classically(), where
+    # is_factored is False only for composites left unsplit when the budget is exhausted
+    splits = {}
+    prime_factors = []
+    composite_factors = []
+
+    # Cofactors are split with an explicit stack rather than by recursion, since there can be
+    # thousands of them (e.g. for a large power of 2)
+    with budget_scope(budget):
+        pending = [n]
+        while pending:
+            m = pending.pop()
+            if m not in splits:
+                is_factored, factors = factorize_classically(m)
+                while not is_factored and not (budget is not None and budget.is_exhausted()):
+                    factors = find_factors(m, p_min, approximation_degree, n_workers, backend,
+                                           simulation_method, batch_size)
+                    is_factored = factors is not None
+                splits[m] = (is_factored, factors)
+
+            is_factored, factors = splits[m]
+            if factors is not None:
+                pending.extend(factors)
+            elif is_factored:
+                prime_factors.append(m)
+            else:
+                composite_factors.append(m)
+
+    if composite_factors:
+        raise BudgetExhausted(f'Budget of {budget.exhausted_limit} exhausted before {n} was'
+                              + ' completely factored', budget.get_report(),
+                              sorted(prime_factors), sorted(composite_factors))
+    return sorted(prime_factors)
+
+
+# Factor many numbers, yielding an (n, factors) pair for each distinct n as soon as it is done,
+# where factors is as returned by factorize(n). Repeated numbers are only factored and yielded
+# once. Numbers that need no quantum computation are yielded immediately. If n_workers is greater
+# than 1, the rest are factored in a shared pool of worker processes (see
+# shors_classical.create_pool), whose gate caches are reused from one number to the next and which
+# share the circuit and result caches of this process, if they are enabled. The input is consumed
+# lazily, with a bounded number of numbers in flight, so arbitrarily long streams can be factored.
+def factorize_many(numbers, p_min=0.95, approximation_degree=None, n_workers=None, backend=None,
+                   simulation_method=None, batch_size=None):
+    # Ensure that the number of workers is a valid integer
+    if n_workers is not None and (n_workers % 1 != 0 or n_workers < 1):
+        raise ValueError(f'Number of workers must be a positive integer or None; found {n_workers}'
+                         + ' instead')
+
+    seen = set()
 
-    # Execute Shor's algorithm for n
-    return run_shors_algorithm(n, p_min)
+    # Factor numbers one at a time in this process
+    if n_workers is None or n_workers == 1:
+        for n in numbers:
+            if n in seen:
+                continue
+            seen.add(n)
+            yield (n, factorize(n, p_min, approximation_degree, backend=backend,
+                                simulation_method=simulation_method, batch_size=batch_size))
+        return
 
+    # Numbers and results (or exceptions) of finished factorizations, in order of completion
+    results = queue.Queue()
+    max_in_flight = 2 * n_workers
+    n_in_flight = 0
 
-# Search for an integer root
+    with create_pool(n_workers) as pool:
+        # Run Shor's algorithm for a composite number in the pool
+        def submit(n):
+            pool.apply_async(run_shors_algorithm,
+                             (n, p_min, approximation_degree, None, backend, simulation_method,
+                              batch_size),
+                             callback=lambda result: results.put((n, result)),
+                             error_callback=lambda error: results.put((n, error)))
+
+        for n in numbers:
+            if n in seen:
+                continue
+            seen.add(n)
+
+            is_factored, factors = factorize_classically(n)
+            if is_factored:
+                yield (n, factors)
+                continue
+
+            # Factors found before are yielded immediately as well
+            result_cache = get_result_cache()
+            factors = None if result_cache is None else result_cache.get_factors(n)
+            if factors is not None:
+                yield (n, factors)
+                continue
+
+            submit(n)
+            n_in_flight += 1
+
+            # Yield any finished results, waiting for one if too many numbers are in flight
+            while n_in_flight >= max_in_flight or not results.empty():
+                n, factors = get_finished_result(results)
+                # The number is known to be composite, so Shor's algorithm is run again if it
+                # failed, as in factorize()
+                if factors is None:
+                    submit(n)
+                    continue
+                yield (n, factors)
+                n_in_flight -= 1
+
+        # Yield the remaining results once the input is exhausted
+        while n_in_flight > 0:
+            n, factors = get_finished_result(results)
+            if factors is None:
+                submit(n)
+                continue
+            yield (n, factors)
+            n_in_flight -= 1
+
+
+# Wait for the next (n, factors) result in the queue, re-raising it if it is an exception.
+# Factors found are stored in the result cache if it is enabled, as in find_factors().
+def get_finished_result(results):
+    n, result = get_from_queue(results)
+    if isinstance(result, BaseException):
+        raise result
+    result_cache = get_result_cache()
+    if result_cache is not None and result is not None:
+        result_cache.put_factors(n, result)
+    return (n, result)
+
+
+# Search for an integer root.
+# Only prime exponents need to be checked, since a k-th power with k composite is also a p-th
+# power for every prime p dividing k. Roots are computed exactly with integers, so this is correct
+# for arbitrarily large n.
 def find_integer_root(n):
     # Imaginary roots are not integers
     if n < 0:
@@ -39,21 +244,43 @@ def find_integer_root(n):
     # Technically 0 or 1 to any positive power equals itself
     elif n == 0 or n == 1:
         return n
+    # Roots of non-integers are not integers either
+    elif n % 1 != 0:
+        return None
     else:
+        n = int(n)
         # Check whether each root is an integer.
-        # We can stop when the root is less than 2, since higher
-        # roots will only asymptotically approach one.
-        j = 2
-        while True:
-            root = n ** (j ** -1)
-            if root < 2:
-                break
-
+        # We can stop when the exponent exceeds log2(n), since the root is then less than 2.
+        for k in get_primes(n.bit_length()):
+            root = find_integer_kth_root(n, k)
             # If the root is an integer, return this root
-            if root % 1 == 0:
-                return int(root)
-
-            j += 1
+            if root ** k == n:
+                return root
 
         # No roots were integers, so return nothing
         return None
+
+
+# Find the largest integer whose k-th power is at most n with Newton's method on integers
+def find_integer_kth_root(n, k):
+    if n < 2:
+        return n
+
+    # Start from a power of 2 which is at least the root, from which the iterates decrease
+    # monotonically until they reach the floor of the root
+    root = 1 << -(-n.bit_length() // k)
+    while True:
+        new_root = ((k - 1) * root + n // root ** (k - 1)) // k
+        if new_root >= root:
+            return root
+        root = new_root
+
+
+# Get all primes up to and including m with the sieve of Eratosthenes
+def get_primes(m):
+    is_prime = [True] * (m + 1)
+    for i in range(2, math.isqrt(m) + 1):
+        if is_prime[i]:
+            for j in range(i * i, m + 1, i):
+                is_prime[j] = False
+    return [i for i in range(2, m + 1) if is_prime[i]]
@@ -1,20 +1,12 @@
+import collections
 import math
 
 import qiskit
 
+from .arithmetic import get_min_n_bits_for_value, get_modular_inverse, is_rotation_kept
 
-# Get the minimum number of bits needed to represent
-# any non-negative integer less than the modulus given.
-def get_min_n_bits_for_modulus(modulus):
-    if modulus == 1:
-        return 1
-    else:
-        return math.ceil(math.log2(modulus))
-
-
-# Get the minimum number of bits needed to represent the given value
-def get_min_n_bits_for_value(value):
-    return get_min_n_bits_for_modulus(value + 1)
+# Helpers which were defined here before moving to arithmetic.py, still importable from here
+from .arithmetic import get_min_n_bits_for_modulus  # noqa: F401
 
 
 # Initialize the qubits of a circuit to the given value
@@ -24,6 +16,96 @@ def initialize_to_value(circuit, value):
             circuit.x(i)
 
 
+# Bounded least-recently-used cache of gates, keyed on the circuit class and the arguments passed
+# to its constructor. Identical sub-gates are requested many times while building the larger
+# arithmetic circuits, so they are constructed once and then shared.
+class GateCache:
+    def __init__(self, max_size=1024):
+        self._gates = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resize(max_size)
+
+    # Get the gate for the given circuit class and constructor arguments, optionally inverted
+    # and/or controlled by the given number of control qubits (applied in that order). Each call
+    # counts as exactly one hit or miss.
+    def get(self, circuit_class, *args, inverse=False, n_controls=0):
+        key = (circuit_class, args, inverse, n_controls)
+
+        if key in self._gates:
+            self.hits += 1
+            self._gates.move_to_end(key)
+            return self._gates[key]
+
+        self.misses += 1
+        return self._build(circuit_class, args, inverse, n_controls)
+
+    # Build a gate which is not in the cache and add it to the cache
+    def _build(self, circuit_class, args, inverse, n_controls):
+        # Build derived gates from the plain gate, which is cached as well. Looking it up is part
+        # of the request for the derived gate, so it is not counted as a hit or miss of its own.
+        if inverse or n_controls > 0:
+            plain_key = (circuit_class, args, False, 0)
+            if plain_key in self._gates:
+                self._gates.move_to_end(plain_key)
+                gate = self._gates[plain_key]
+            else:
+                gate = self._build(circuit_class, args, False, 0)
+            if inverse:
+                gate = gate.inverse()
+            if n_controls > 0:
+                gate = gate.control(n_controls)
+        else:
+            gate = circuit_class(*args).to_gate()
+
+        if self.max_size is None or self.max_size > 0:
+            self._gates[(circuit_class, args, inverse, n_controls)] = gate
+            self._evict()
+
+        return gate
+
+    # Change the maximum number of gates held. None means unbounded and 0 disables caching.
+    def resize(self, max_size):
+        if max_size is not None and (max_size % 1 != 0 or max_size < 0):
+            raise ValueError(f'Cache size must be a non-negative integer or None; found {max_size}'
+                             + ' instead')
+        self.max_size = max_size
+        self._evict()
+
+    # Remove all gates and reset the statistics
+    def clear(self):
+        self._gates.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Get the hit/miss statistics and current size of the cache
+    def get_stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._gates),
+                'max_size': self.max_size}
+
+    # Drop the least recently used gates until the size bound is satisfied
+    def _evict(self):
+        if self.max_size is None:
+            return
+        while len(self._gates) > self.max_size:
+            self._gates.popitem(last=False)
+            self.evictions += 1
+
+
+# Cache shared by all of the gate constructors below
+gate_cache = GateCache()
+
+
+# Get a gate from the shared cache
+def get_gate(circuit_class, *args, inverse=False, n_controls=0):
+    return gate_cache.get(circuit_class, *args, inverse=inverse, n_controls=n_controls)
+
+
 # Implementation of an R_k gate, a single-qubit gate which advances the phase of the |1> component
 # by 2 * pi / 2 ** k. Equivalent to a z-rotation up to an overall phase.
 class Rk(qiskit.circuit.library.U1Gate):
@@ -37,22 +119,40 @@ def reverse_qubits(circuit):
         circuit.swap(i, circuit.num_qubits - 1 - i)
 
 
-# Implementation of the quantum Fourier transform
+# Implementation of the quantum Fourier transform. If an approximation degree is given, the
+# controlled rotations with k greater than it are dropped, leaving O(n_qubits * degree) gates.
 class QFT(qiskit.QuantumCircuit):
-    def __init__(self, n_qubits):
+    def __init__(self, n_qubits, approximation_degree=None):
         super().__init__(n_qubits, name='QFT')
         for i in range(n_qubits - 1, -1, -1):
             self.h(i)
             for j in range(i - 1, -1, -1):
                 k = i - j + 1
+                # k only increases from here, so the remaining rotations are dropped too
+                if not is_rotation_kept(k, approximation_degree):
+                    break
                 self.append(Rk(k).control(1), [self.qubits[j], self.qubits[i]])
         reverse_qubits(self)
 
 
-# Gate which maps QFT(b) to QFT(b + c), where c is a constant compiled into the circuit
+# Gate which maps QFT(b) to QFT(b + c), where c is a constant compiled into the circuit.
+# If an approximation degree is given, the 2 ** -k terms with k greater than it are dropped.
+# With n_controls > 0, the first n_controls qubits control the addition, which is built directly
+# from multi-controlled phase rotations rather than by generic controlled-gate synthesis. If
+# subtract is True, the angles are negated so that the gate maps QFT(b) to QFT(b - c) exactly
+# undoing the addition.
 class FixedQFTAdder(qiskit.QuantumCircuit):
-    def __init__(self, n_qubits, c):
-        super().__init__(n_qubits, name=f'FixedQFTAdder({c})')
+    def __init__(self, n_qubits, c, approximation_degree=None, n_controls=0, subtract=False):
+        name = f'FixedQFTAdder({c})'
+        if subtract:
+            name = f'FixedQFTSubtractor({c})'
+        if n_controls > 0:
+            name = f'C{n_controls}{name}'
+        super().__init__(n_controls + n_qubits, name=name)
+
+        controls = self.qubits[:n_controls]
+        targets = self.qubits[n_controls:]
+        sign = -1 if subtract else 1
 
         # Loop over each input qubit
         for i in range(n_qubits):
@@ -66,108 +166,105 @@ class FixedQFTAdder(qiskit.QuantumCircuit):
                     k = n_qubits - i - j
 
                     # Add effect of current bit of c to this qubit
-                    reciprocal_sum += 2 ** -k
+                    if is_rotation_kept(k, approximation_degree):
+                        reciprocal_sum += 2 ** -k
 
-            # Apply the cumulative action of all bits of c to the current qubit
-            self.u1(2 * math.pi * reciprocal_sum, self.qubits[i])
+            # Apply the cumulative action of all bits of c to the current qubit,
+            # unless there is nothing to apply
+            if reciprocal_sum == 0:
+                continue
+            angle = sign * 2 * math.pi * reciprocal_sum
+            if n_controls == 0:
+                self.u1(angle, targets[i])
+            else:
+                self.append(qiskit.circuit.library.U1Gate(angle).control(n_controls),
+                            controls + [targets[i]])
 
 
 # Doubly controlled gate which maps QFT(b) to QFT((b + c) % n), where both c and n are
 # constants compiled into the circuit
 class CCModularFixedQFTAdder(qiskit.QuantumCircuit):
-    def __init__(self, n_data_qubits, c, n):
+    def __init__(self, n_data_qubits, c, n, approximation_degree=None):
         super().__init__(2 + n_data_qubits + 2, name=f'CCModularFixedQFTAdder({c}) mod {n}')
 
-        # Construct the component gates needed
-        fixed_adder_c = FixedQFTAdder(n_data_qubits + 1, c % n).to_gate()
-        fixed_adder_n = FixedQFTAdder(n_data_qubits + 1, n).to_gate()
-        qft = QFT(n_data_qubits + 1).to_gate()
+        # Get the component gates needed
+        cc_fixed_adder_c = get_gate(FixedQFTAdder, n_data_qubits + 1, c % n, approximation_degree,
+                                    2)
+        cc_fixed_subtractor_c = get_gate(FixedQFTAdder, n_data_qubits + 1, c % n,
+                                         approximation_degree, 2, True)
+        c_fixed_adder_n = get_gate(FixedQFTAdder, n_data_qubits + 1, n, approximation_degree, 1)
+        fixed_subtractor_n = get_gate(FixedQFTAdder, n_data_qubits + 1, n, approximation_degree,
+                                      0, True)
+        qft = get_gate(QFT, n_data_qubits + 1, approximation_degree)
+        qft_inverse = get_gate(QFT, n_data_qubits + 1, approximation_degree, inverse=True)
 
         # First add c
-        self.append(fixed_adder_c.control(2), self.qubits[:-1])
+        self.append(cc_fixed_adder_c, self.qubits[:-1])
 
         # Subtract n
-        self.append(fixed_adder_n.inverse(), self.qubits[2:-1])
+        self.append(fixed_subtractor_n, self.qubits[2:-1])
 
         # Invert QFT in order to store state of most significant (carry) qubit in an ancilla qubit.
         # This records whether b + c - n is negative (i.e. whether b + c < n). Then restore QFT.
-        self.append(qft.inverse(), self.qubits[2:-1])
+        self.append(qft_inverse, self.qubits[2:-1])
         self.cx(self.qubits[-2], self.qubits[-1])
         self.append(qft, self.qubits[2:-1])
 
         # Add n back if b + c - n was negative
-        self.append(fixed_adder_n.control(1), [self.qubits[-1]] + self.qubits[2:-1])
+        self.append(c_fixed_adder_n, [self.qubits[-1]] + self.qubits[2:-1])
 
         # Subtract c
-        self.append(fixed_adder_c.inverse().control(2), self.qubits[:-1])
+        self.append(cc_fixed_subtractor_c, self.qubits[:-1])
 
         # Invert QFT to use most significant bit again to restore the last (ancilla) qubit to 0 if
         # it was flipped earlier. Then restore QFT.
-        self.append(qft.inverse(), self.qubits[2:-1])
+        self.append(qft_inverse, self.qubits[2:-1])
         self.x(self.qubits[-2])
         self.cx(self.qubits[-2], self.qubits[-1])
         self.x(self.qubits[-2])
         self.append(qft, self.qubits[2:-1])
 
         # Finally, add c back in
-        self.append(fixed_adder_c.control(2), self.qubits[:-1])
+        self.append(cc_fixed_adder_c, self.qubits[:-1])
 
 
 # Controlled gate which maps |x>|b> to |x>|(b + x * c) % n>
 # where c and n are compiled into the circuit
 class CPartialModularFixedMultiplier(qiskit.QuantumCircuit):
-    def __init__(self, n_data_qubits, c, n):
+    def __init__(self, n_data_qubits, c, n, approximation_degree=None):
         super().__init__(1 + 2 * n_data_qubits + 2,
                          name=f'CPartialModularFixedMultiplier({c}) mod {n}')
 
-        # Construct the required QFT gate
-        qft = QFT(n_data_qubits + 1).to_gate()
+        # Get the required QFT gates
+        qft = get_gate(QFT, n_data_qubits + 1, approximation_degree)
+        qft_inverse = get_gate(QFT, n_data_qubits + 1, approximation_degree, inverse=True)
 
         # Apply QFT since adder circuit is in Fourier space
         self.append(qft, self.qubits[-(n_data_qubits + 2):-1])
 
         # Loop over data qubits
         for i in range(n_data_qubits):
-            # Apply an adder of 2 ** i * c controlled by the ith data qubit
-            self.append(CCModularFixedQFTAdder(n_data_qubits, 2 ** i * c, n).to_gate(),
+            # Apply an adder of 2 ** i * c controlled by the ith data qubit. Only the value
+            # modulo n matters, so reduce it to share the gate with other multipliers.
+            self.append(get_gate(CCModularFixedQFTAdder, n_data_qubits, 2 ** i * c % n, n,
+                                 approximation_degree),
                         ([self.qubits[0]]
                          + [self.qubits[1 + i]]
                          + self.qubits[-(n_data_qubits + 2):]))
 
         # Invert QFT
-        self.append(qft.inverse(), self.qubits[-(n_data_qubits + 2):-1])
-
-
-# Euclidean algorithm for finding modular inverse of a relative to n (such that a * a^-1 % n == 1).
-# Adapted from:
-# https://en.wikipedia.org/w/index.php?title=Extended_Euclidean_algorithm&oldid=949971910
-def get_modular_inverse(a, n):
-    t = 0
-    new_t = 1
-    r = n
-    new_r = a
-
-    while new_r != 0:
-        q = r // new_r
-        t, new_t = (new_t, t - q * new_t)
-        r, new_r = (new_r, r - q * new_r)
-
-    if r > 1:
-        raise ValueError(f'{a} is not invertible relative to {n}')
-
-    if t < 0:
-        t += n
-
-    return t
+        self.append(qft_inverse, self.qubits[-(n_data_qubits + 2):-1])
 
 
 # Controlled gate which maps |b> to |b * c % n> where c and n are compiled into the circuit
 class CModularFixedMultiplier(qiskit.QuantumCircuit):
-    def __init__(self, n_data_qubits, c, n):
+    def __init__(self, n_data_qubits, c, n, approximation_degree=None):
         super().__init__(1 + 2 * n_data_qubits + 2, name=f'CModularFixedMultiplier({c}) mod {n}')
 
         # Perform multiplication
-        self.append(CPartialModularFixedMultiplier(n_data_qubits, c, n).to_gate(), self.qubits)
+        self.append(get_gate(CPartialModularFixedMultiplier, n_data_qubits, c % n, n,
+                             approximation_degree),
+                    self.qubits)
 
         # Need modular inverse of c in order to undo action on ancilla qubits
         c_inverse = get_modular_inverse(c, n)
@@ -177,14 +274,14 @@ class CModularFixedMultiplier(qiskit.QuantumCircuit):
             self.cswap(self.qubits[0], self.qubits[1 + i], self.qubits[1 + n_data_qubits + i])
 
         # Reversibly reset ancilla register to 0
-        self.append(CPartialModularFixedMultiplier(n_data_qubits,
-                                                   c_inverse,
-                                                   n).to_gate().inverse(), self.qubits)
+        self.append(get_gate(CPartialModularFixedMultiplier, n_data_qubits, c_inverse, n,
+                             approximation_degree, inverse=True),
+                    self.qubits)
 
 
 # Circuit which maps |a>|0> to |a>|x ** a % n>. x and n are compiled into the circuit.
 class ModularFixedExponentiator(qiskit.QuantumCircuit):
-    def __init__(self, n_exponent_qubits, n_base_qubits, x, n):
+    def __init__(self, n_exponent_qubits, n_base_qubits, x, n, approximation_degree=None):
         super().__init__(n_exponent_qubits + 2 * n_base_qubits + 2,
                          name=f'ModularFixedExponentiator({x}) mod {n}')
 
@@ -193,6 +290,8 @@ class ModularFixedExponentiator(qiskit.QuantumCircuit):
 
         # Loop over qubits of exponent register
         for i in range(n_exponent_qubits):
-            # Multiply by x ** (2 ** i), controlled by current exponent qubit
-            self.append(CModularFixedMultiplier(n_base_qubits, x ** (2 ** i), n).to_gate(),
+            # Multiply by x ** (2 ** i), controlled by current exponent qubit. Only the value
+            # modulo n matters, so reduce it to share the gate with other exponentiators.
+            self.append(get_gate(CModularFixedMultiplier, n_base_qubits, pow(x, 2 ** i, n), n,
+                                 approximation_degree),
                         [self.qubits[i]] + self.qubits[n_exponent_qubits:])
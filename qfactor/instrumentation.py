@@ -0,0 +1,92 @@
+import collections
+import contextlib
+import logging
+import time
+
+# Functions called as listener(event, data) for every event, where event is the name of the event
+# and data is a dictionary of its values. Nothing is reported while there are no listeners.
+#
+# Events reported:
+#   order_finding_started   x, n, q
+#   circuit_built           x, n, duration
+#   circuit_optimized       x, n, duration
+#   circuit_transpiled      x, n, duration
+#   circuit_simulated       x, n, shots, simulator, duration (and simulation_method for Aer)
+#   c_measured              x, n, c
+#   order_candidate         x, n, c, r_candidate, verified
+#   order_found             x, n, r, simulations, candidates
+#   base_attempted          n, x, attempt, factors
+#   budget_exhausted        n, limit, confidence
+#   shors_algorithm_finished n, attempts, factors, confidence
+#
+# For jobs that build, transpile or simulate several circuits at once (see
+# shors_quantum.get_orders), x and n are lists with the values of every circuit.
+#
+# Events from worker processes (see shors_classical.run_parallel_attempts) are not forwarded, but
+# base_attempted is still reported by the main process for each finished attempt.
+listeners = []
+
+
+# Start reporting events to the given listener
+def add_listener(listener):
+    listeners.append(listener)
+
+
+# Stop reporting events to the given listener
+def remove_listener(listener):
+    listeners.remove(listener)
+
+
+# Report an event to all listeners
+def emit(event, **data):
+    for listener in listeners:
+        listener(event, data)
+
+
+# Context manager which reports an event with the time taken by its body as the duration.
+# The body is not timed at all if there are no listeners.
+@contextlib.contextmanager
+def timed(event, **data):
+    if not listeners:
+        yield
+        return
+
+    start = time.perf_counter()
+    yield
+    emit(event, duration=time.perf_counter() - start, **data)
+
+
+# Listener which writes each event to a logger as a single line of key=value pairs
+class LoggingListener:
+    def __init__(self, logger=None, level=logging.INFO):
+        if logger is None:
+            logger = logging.getLogger('qfactor')
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, event, data):
+        if self.logger.isEnabledFor(self.level):
+            values = ' '.join(f'{key}={value}' for key, value in data.items())
+            self.logger.log(self.level, f'{event} {values}')
+
+
+# Listener which aggregates the number of each event and the total duration of timed events
+class MetricsCollector:
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.durations = collections.Counter()
+
+    def __call__(self, event, data):
+        self.counts[event] += 1
+        if 'duration' in data:
+            self.durations[event] += data['duration']
+
+    # Remove all collected metrics
+    def clear(self):
+        self.counts.clear()
+        self.durations.clear()
+
+    # Get the count and total duration of every event seen so far
+    def get_summary(self):
+        return {event: {'count': count, 'total_duration': self.durations.get(event)}
+                for event, count in self.counts.items()}
@@ -0,0 +1,61 @@
+import fractions
+
+
+# Reduce a basis of an integer lattice with the Lenstra-Lenstra-Lovasz algorithm, using exact
+# rational arithmetic. The basis is a list of linearly independent integer vectors, and the reduced
+# basis is returned as a new list with its shortest vectors first. The parameter delta in (1/4, 1]
+# sets how strongly the basis is reduced.
+def reduce_basis(basis, delta=fractions.Fraction(3, 4)):
+    # Ensure that delta is in the range where the algorithm terminates
+    if not fractions.Fraction(1, 4) < delta <= 1:
+        raise ValueError(f'delta must be in (1/4, 1]; found {delta} instead')
+
+    basis = [list(vector) for vector in basis]
+    orthogonal_basis, coefficients = get_gram_schmidt(basis)
+
+    k = 1
+    while k < len(basis):
+        # Size-reduce vector k against all earlier vectors
+        for j in range(k - 1, -1, -1):
+            multiple = round(coefficients[k][j])
+            if multiple != 0:
+                basis[k] = [a - multiple * b for a, b in zip(basis[k], basis[j])]
+                orthogonal_basis, coefficients = get_gram_schmidt(basis)
+
+        # Check the Lovasz condition, swapping vectors k and k - 1 if it fails
+        if (get_squared_norm(orthogonal_basis[k])
+                >= (delta - coefficients[k][k - 1] ** 2)
+                * get_squared_norm(orthogonal_basis[k - 1])):
+            k += 1
+        else:
+            basis[k], basis[k - 1] = basis[k - 1], basis[k]
+            orthogonal_basis, coefficients = get_gram_schmidt(basis)
+            k = max(k - 1, 1)
+
+    return basis
+
+
+# Get the Gram-Schmidt orthogonalization of a basis (without normalization) and the coefficients
+# mu[i][j] = <b_i, b*_j> / <b*_j, b*_j> of the projections onto the orthogonal vectors
+def get_gram_schmidt(basis):
+    orthogonal_basis = []
+    coefficients = [[fractions.Fraction(0)] * len(basis) for vector in basis]
+    for i, vector in enumerate(basis):
+        orthogonal_vector = [fractions.Fraction(a) for a in vector]
+        for j in range(i):
+            coefficients[i][j] = (get_dot_product(vector, orthogonal_basis[j])
+                                  / get_squared_norm(orthogonal_basis[j]))
+            orthogonal_vector = [a - coefficients[i][j] * b
+                                 for a, b in zip(orthogonal_vector, orthogonal_basis[j])]
+        orthogonal_basis.append(orthogonal_vector)
+    return (orthogonal_basis, coefficients)
+
+
+# Get the dot product of two vectors
+def get_dot_product(vector, other_vector):
+    return sum(a * b for a, b in zip(vector, other_vector))
+
+
+# Get the squared Euclidean norm of a vector
+def get_squared_norm(vector):
+    return get_dot_product(vector, vector)
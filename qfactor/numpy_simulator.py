@@ -0,0 +1,66 @@
+import math
+
+import numpy
+
+
+# Get the values of x ** a % n for every exponent a in [0, count) as an array.
+# The table is filled by doubling: the block for [k, 2k) is the block for [0, k) times x ** k.
+def get_powers(x, n, count):
+    powers = numpy.ones(count, dtype=numpy.int64)
+    filled = 1
+    while filled < count:
+        block_size = min(filled, count - filled)
+        powers[filled:filled + block_size] = powers[:block_size] * pow(x, filled, n) % n
+        filled += block_size
+    return powers
+
+
+# Get the exact probability of measuring each value of c in [0, q) from the order-finding circuit.
+#
+# After exponentiation, the state is a sum over the residues y = x ** a % n of
+# |{a : x ** a % n == y}>|y>. The exponents sharing a residue are exactly the arithmetic
+# progressions s, s + r, s + 2r, ... for s in [0, r), where r is the order of x. The QFT of each
+# progression is a geometric series in closed form, so only the exponent register ever needs to be
+# represented, and the distribution is computed in O(q) memory instead of simulating all qubits.
+def get_c_distribution(x, n, q):
+    # Ensure that x is invertible relative to n, so that the powers of x are purely periodic
+    if math.gcd(x, n) != 1:
+        raise ValueError(f'x must be coprime to n; found x = {x} and n = {n} instead')
+
+    # The order is the first exponent after 0 at which the powers return to 1. It is at most n - 1.
+    powers = get_powers(x, n, n)
+    r = int(numpy.flatnonzero(powers[1:] == 1)[0]) + 1
+
+    # q // r progressions have one more term than the rest
+    n_terms = q // r
+    n_long_progressions = q % r
+
+    # Phase advanced by each step of a progression, reduced modulo 2 * pi for precision
+    c = numpy.arange(q, dtype=numpy.int64)
+    reduced_products = r * c % q
+    theta = math.pi * reduced_products / q
+
+    # |sum_j exp(2 * pi * i * j * r * c / q)| ** 2 for a progression of length m,
+    # which is m ** 2 wherever r * c is a multiple of q
+    aligned = reduced_products == 0
+    sin_theta_squared = numpy.where(aligned, 1, numpy.sin(theta) ** 2)
+
+    def squared_magnitude(m):
+        return numpy.where(aligned, m ** 2, numpy.sin(m * theta) ** 2 / sin_theta_squared)
+
+    distribution = (n_long_progressions * squared_magnitude(n_terms + 1)
+                    + (r - n_long_progressions) * squared_magnitude(n_terms)) / q ** 2
+
+    # Renormalize to absorb floating point error
+    return distribution / distribution.sum()
+
+
+# Sample the order-finding circuit the given number of times.
+# Returns a dictionary mapping each measured value of c to the number of times it was measured.
+def get_counts(x, n, q, shots, rng=None):
+    if rng is None:
+        rng = numpy.random.default_rng()
+
+    samples = rng.choice(q, size=shots, p=get_c_distribution(x, n, q))
+    values, counts = numpy.unique(samples, return_counts=True)
+    return {int(value): int(count) for value, count in zip(values, counts)}
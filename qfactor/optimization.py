@@ -0,0 +1,188 @@
+import collections
+import math
+
+import qiskit
+
+# Gates which are their own inverse, so that two of them in a row on the same qubits cancel
+SELF_INVERSE_GATES = ('h', 'x', 'cx', 'swap', 'cswap')
+
+# Phase rotations, which are diagonal and symmetric in their qubits, by the number of controls
+PHASE_GATES = {'u1': 0, 'cu1': 1, 'mcu1': 2}
+
+# Angles closer than this to a multiple of 2 * pi are treated as no rotation at all
+ANGLE_TOLERANCE = 1e-12
+
+
+# Optimize a circuit before execution by flattening all of its composite gates and fusing the
+# resulting gates in Fourier space. Phase rotations (which are all diagonal, so they commute with
+# each other) are merged with earlier rotations on the same set of qubits whenever only other
+# rotations lie in between, and dropped if their angles cancel out. Adjacent pairs of identical
+# self-inverse gates are removed. Together these cancel the subtraction of n that follows each
+# addition of n across the boundary of two modular multipliers, and each inverse QFT followed by
+# a QFT on the same qubits, gate by gate. Returns a new flat circuit with the same registers.
+def optimize_circuit(circuit):
+    fuser = GateFuser()
+    for instruction, qargs, cargs in flatten_circuit(circuit):
+        fuser.add(instruction, qargs, cargs)
+
+    optimized_circuit = qiskit.QuantumCircuit(*circuit.qregs, *circuit.cregs, name=circuit.name)
+    for instruction, qargs, cargs in fuser.get_instructions():
+        optimized_circuit.append(instruction, qargs, cargs)
+    return optimized_circuit
+
+
+# Generate the (instruction, qubits, clbits) triples of a circuit with every composite gate built
+# by the circuits in this package replaced by its definition, recursively
+def flatten_circuit(circuit, qubit_map=None, clbit_map=None):
+    for instruction, qargs, cargs in circuit.data:
+        if qubit_map is not None:
+            qargs = [qubit_map[qubit] for qubit in qargs]
+            cargs = [clbit_map[clbit] for clbit in cargs]
+
+        if is_composite(instruction):
+            definition = instruction.definition
+            yield from flatten_circuit(definition,
+                                       dict(zip(definition.qubits, qargs)),
+                                       dict(zip(definition.clbits, cargs)))
+        else:
+            yield (instruction, list(qargs), list(cargs))
+
+
+# Check whether an instruction is a composite gate made from a circuit (see
+# QuantumCircuit.to_gate() and Gate.inverse()) rather than a standard gate
+def is_composite(instruction):
+    return (type(instruction) in (qiskit.circuit.Gate, qiskit.circuit.Instruction)
+            and instruction.definition is not None
+            and getattr(instruction, 'condition', None) is None)
+
+
+# Check whether an instruction is an unconditioned phase rotation
+def is_phase_gate(instruction):
+    return (instruction.name in PHASE_GATES
+            and getattr(instruction, 'condition', None) is None)
+
+
+# Check whether an angle is equivalent to no rotation
+def is_zero_angle(angle):
+    remainder = angle % (2 * math.pi)
+    return min(remainder, 2 * math.pi - remainder) < ANGLE_TOLERANCE
+
+
+# Make a phase rotation by the given angle with the given number of controls
+def make_phase_gate(angle, n_controls):
+    gate = qiskit.circuit.library.U1Gate(angle)
+    if n_controls > 0:
+        gate = gate.control(n_controls)
+    return gate
+
+
+# Builds up an optimized list of instructions one at a time. For each qubit, the indices of the
+# instructions acting on it are kept so that the latest instructions on any set of qubits can be
+# found and removed, along with the phase rotations since the last other instruction on it (keyed
+# on the set of qubits they act on), which are the rotations a new one may be merged into.
+class GateFuser:
+    def __init__(self):
+        self._instructions = []
+        self._qubit_instructions = collections.defaultdict(list)
+        self._open_phase_gates = collections.defaultdict(dict)
+
+    # Add an instruction, fusing or cancelling it with earlier instructions where possible
+    def add(self, instruction, qargs, cargs):
+        if is_phase_gate(instruction):
+            index = self._find_phase_gate(qargs)
+            if index is not None:
+                earlier_instruction, earlier_qargs, earlier_cargs = self._instructions[index]
+                angle = float(earlier_instruction.params[0]) + float(instruction.params[0])
+                if is_zero_angle(angle):
+                    self._remove(index)
+                else:
+                    self._instructions[index] = (make_phase_gate(angle, len(qargs) - 1),
+                                                 earlier_qargs, earlier_cargs)
+                return
+            if is_zero_angle(float(instruction.params[0])):
+                return
+        elif instruction.name in SELF_INVERSE_GATES and not cargs:
+            index = self._find_last_common(qargs)
+            if index is not None:
+                earlier_instruction, earlier_qargs, earlier_cargs = self._instructions[index]
+                if (earlier_instruction.name == instruction.name
+                        and getattr(earlier_instruction, 'condition', None) is None
+                        and getattr(instruction, 'condition', None) is None
+                        and is_same_target(instruction.name, earlier_qargs, qargs)):
+                    self._remove(index)
+                    return
+
+        index = len(self._instructions)
+        self._instructions.append((instruction, qargs, cargs))
+        for qubit in qargs:
+            self._qubit_instructions[qubit].append(index)
+            if is_phase_gate(instruction):
+                self._open_phase_gates[qubit][frozenset(qargs)] = index
+            else:
+                self._open_phase_gates[qubit].clear()
+
+    # Get the remaining (instruction, qubits, clbits) triples in order
+    def get_instructions(self):
+        return [instruction for instruction in self._instructions if instruction is not None]
+
+    # Find an earlier phase rotation on exactly the given qubits which the new rotation can be
+    # merged into, i.e. one after which only phase rotations act on any of the qubits
+    def _find_phase_gate(self, qargs):
+        key = frozenset(qargs)
+        index = self._open_phase_gates[qargs[0]].get(key)
+        if index is None:
+            return None
+        for qubit in qargs[1:]:
+            if self._open_phase_gates[qubit].get(key) != index:
+                return None
+        return index
+
+    # Find the index of the instruction that is the last one on every given qubit, if any
+    def _find_last_common(self, qargs):
+        indices = set()
+        for qubit in qargs:
+            qubit_instructions = self._qubit_instructions[qubit]
+            if not qubit_instructions:
+                return None
+            indices.add(qubit_instructions[-1])
+        if len(indices) != 1:
+            return None
+        return indices.pop()
+
+    # Remove the instruction at the given index
+    def _remove(self, index):
+        instruction, qargs, cargs = self._instructions[index]
+        self._instructions[index] = None
+        for qubit in qargs:
+            # Removed instructions are nearly always among the last ones on each qubit
+            qubit_instructions = self._qubit_instructions[qubit]
+            position = len(qubit_instructions) - 1
+            while qubit_instructions[position] != index:
+                position -= 1
+            del qubit_instructions[position]
+
+            if is_phase_gate(instruction):
+                del self._open_phase_gates[qubit][frozenset(qargs)]
+            else:
+                # The rotations before the removed instruction are open to merging again
+                self._reopen_phase_gates(qubit)
+
+    # Find the phase rotations since the last other instruction on a qubit
+    def _reopen_phase_gates(self, qubit):
+        open_phase_gates = self._open_phase_gates[qubit]
+        open_phase_gates.clear()
+        for index in reversed(self._qubit_instructions[qubit]):
+            instruction, qargs, cargs = self._instructions[index]
+            if not is_phase_gate(instruction):
+                break
+            open_phase_gates.setdefault(frozenset(qargs), index)
+
+
+# Check whether two self-inverse gates act identically on their qubits. SWAP is symmetric in both
+# qubits and controlled SWAP in its targets; otherwise the qubits must match in order.
+def is_same_target(name, qargs, other_qargs):
+    if name == 'swap':
+        return set(qargs) == set(other_qargs)
+    if name == 'cswap':
+        return qargs[0] == other_qargs[0] and set(qargs[1:]) == set(other_qargs[1:])
+    return list(qargs) == list(other_qargs)
@@ -0,0 +1,131 @@
+import math
+
+# Bases for which the Miller-Rabin test is deterministic for all n below the bound
+# (Sorenson and Webster, 2015)
+DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+DETERMINISTIC_BOUND = 3317044064679887385961981
+
+
+# Check whether n is prime with the Miller-Rabin test.
+# The result is exact for n below DETERMINISTIC_BOUND. Above it, a strong Lucas test is added to
+# the Miller-Rabin test (whose bases include 2), which makes it the Baillie-PSW test. That result
+# is probabilistic, but no composite number is known to pass it, and it costs only a few modular
+# exponentiations however large n is.
+def is_prime(n):
+    # Ensure that n is an integer
+    if n % 1 != 0:
+        raise TypeError(f'Input must be an integer; found {n} instead')
+    n = int(n)
+
+    if n < 2:
+        return False
+
+    # Handle small primes and numbers with small factors directly
+    for base in DETERMINISTIC_BASES:
+        if n % base == 0:
+            return n == base
+
+    # Write n - 1 as d * 2 ** s with d odd
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    if not all(is_strong_probable_prime(n, base, d, s) for base in DETERMINISTIC_BASES):
+        return False
+
+    return n < DETERMINISTIC_BOUND or is_strong_lucas_probable_prime(n)
+
+
+# Check whether n passes the strong probable prime test to the given base,
+# where n - 1 = d * 2 ** s with d odd
+def is_strong_probable_prime(n, base, d, s):
+    y = pow(base, d, n)
+    if y == 1 or y == n - 1:
+        return True
+    for i in range(s - 1):
+        y = y * y % n
+        if y == n - 1:
+            return True
+    return False
+
+
+# Check whether an odd n > 1 passes the strong Lucas probable prime test with Selfridge's
+# parameters: D is the first of 5, -7, 9, -11, ... with Jacobi symbol (D / n) = -1, P = 1 and
+# Q = (1 - D) / 4. With n + 1 = d * 2 ** s and d odd, n passes if U_d = 0 or V_(d * 2 ** r) = 0
+# modulo n for some 0 <= r < s.
+def is_strong_lucas_probable_prime(n):
+    # No suitable D exists for perfect squares
+    if math.isqrt(n) ** 2 == n:
+        return False
+
+    D = 5
+    while True:
+        jacobi_symbol = get_jacobi_symbol(D, n)
+        if jacobi_symbol == -1:
+            break
+        # D shares a factor with n
+        if jacobi_symbol == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P = 1
+    Q = (1 - D) // 4
+
+    # Write n + 1 as d * 2 ** s with d odd
+    d = n + 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    U, V, Q_power = get_lucas_sequence(n, P, Q, D, d)
+    if U == 0 or V == 0:
+        return True
+    for r in range(1, s):
+        # V_2k = V_k ** 2 - 2 * Q ** k
+        V = (V * V - 2 * Q_power) % n
+        Q_power = Q_power * Q_power % n
+        if V == 0:
+            return True
+    return False
+
+
+# Get U_k and V_k of the Lucas sequences with parameters P and Q (where D = P ** 2 - 4 * Q), and
+# Q ** k, all modulo an odd n. The index is built up from the most significant bit of k by
+# doubling it and then adding one where the bit is set.
+def get_lucas_sequence(n, P, Q, D, k):
+    U = 1
+    V = P
+    Q_power = Q % n
+    for bit in bin(k)[3:]:
+        # U_2k = U_k * V_k and V_2k = V_k ** 2 - 2 * Q ** k
+        U, V = U * V % n, (V * V - 2 * Q_power) % n
+        Q_power = Q_power * Q_power % n
+        if bit == '1':
+            # U_(k+1) = (P * U_k + V_k) / 2 and V_(k+1) = (D * U_k + P * V_k) / 2, where the
+            # division by 2 is done modulo n by first making the numerator even
+            U, V = P * U + V, D * U + P * V
+            if U % 2 != 0:
+                U += n
+            if V % 2 != 0:
+                V += n
+            U, V = U // 2 % n, V // 2 % n
+            Q_power = Q_power * Q % n
+    return U, V, Q_power
+
+
+# Get the Jacobi symbol (a / n) for an odd n > 0
+def get_jacobi_symbol(a, n):
+    a %= n
+    result = 1
+    while a != 0:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
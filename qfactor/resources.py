@@ -0,0 +1,205 @@
+import collections
+import math
+
+from .arithmetic import get_min_n_bits_for_modulus, get_modular_inverse, is_rotation_kept
+from .shors_quantum import get_q
+from .simulation import BYTES_PER_AMPLITUDE
+
+
+# Estimate the resources of the order-finding circuit for n without building it, following the
+# structure of the circuits in gates.py and shors_quantum.py exactly.
+# Gates are counted as they are appended by those circuits, with controls folded into the gate
+# name: 'u1', 'cu1' and 'mcu1' are phase rotations with 0, 1 and 2 controls, and 'c_if_u1' is a
+# classically conditioned rotation. The number of rotations in each fixed adder depends on the
+# constant added, so exact counts need the base x; without it, every adder is assumed to apply all
+# of its rotations, which gives an upper bound.
+# The depth is that of the circuit flattened into these gates when each sub-gate starts only after
+# the previous one finishes, which is an upper bound on the true depth.
+# The number of exponent bits can be reduced as in shors_quantum.get_order().
+# Returns a dictionary of the number of qubits, gate counts, total size, depth and the memory
+# needed to hold the statevector.
+def estimate_resources(n, x=None, semiclassical=False, approximation_degree=None,
+                       n_exponent_bits=None):
+    # Ensure that n is a valid integer
+    if n % 1 != 0 or n < 3:
+        raise ValueError(f'n must be an integer greater than 2; found {n} instead')
+
+    # Ensure that x is a valid integer
+    if x is not None and (x % 1 != 0 or x < 2 or x >= n or math.gcd(x, n) != 1):
+        raise ValueError(f'x must be None or an integer in [2, n) coprime to n; found {x} instead')
+
+    # Ensure that the approximation degree is a valid integer
+    if approximation_degree is not None and (approximation_degree % 1 != 0
+                                             or approximation_degree < 1):
+        raise ValueError('Approximation degree must be a positive integer or None;'
+                         + f' found {approximation_degree} instead')
+
+    # Ensure that the number of exponent bits is a valid integer
+    if n_exponent_bits is not None and (n_exponent_bits % 1 != 0 or n_exponent_bits < 1):
+        raise ValueError('Number of exponent bits must be a positive integer or None;'
+                         + f' found {n_exponent_bits} instead')
+
+    # Ensure that q = 2 ** n_exponent_bits exceeds n, without which the measured values cannot
+    # determine the order
+    if n_exponent_bits is not None and n_exponent_bits <= int(n).bit_length():
+        raise ValueError(f'Number of exponent bits must be greater than the {int(n).bit_length()}'
+                         + f' bits of n = {n}; found {n_exponent_bits} instead')
+
+    if n_exponent_bits is None:
+        n_exponent_bits = get_min_n_bits_for_modulus(get_q(n))
+    n_base_qubits = get_min_n_bits_for_modulus(n)
+    estimator = ResourceEstimator(n_base_qubits, n, approximation_degree)
+
+    counts = collections.Counter()
+    depth = 0
+
+    # Result register initialized to 1
+    counts['x'] += 1
+    depth += 1
+
+    if semiclassical:
+        n_qubits = 1 + 2 * n_base_qubits + 2
+        for i in range(n_exponent_bits - 1, -1, -1):
+            if i < n_exponent_bits - 1:
+                counts['reset'] += 1
+                depth += 1
+            counts['h'] += 2
+            counts['measure'] += 1
+            n_rotations = sum(1 for j in range(i + 1, n_exponent_bits)
+                              if is_rotation_kept(j - i + 1, approximation_degree))
+            counts['c_if_u1'] += n_rotations
+            depth += 3 + n_rotations
+            multiplier_counts, multiplier_depth = estimator.get_multiplier(get_power(x, i, n))
+            counts += multiplier_counts
+            depth += multiplier_depth
+    else:
+        n_qubits = n_exponent_bits + 2 * n_base_qubits + 2
+        counts['h'] += n_exponent_bits
+        counts['measure'] += n_exponent_bits
+        depth += 2
+        for i in range(n_exponent_bits):
+            multiplier_counts, multiplier_depth = estimator.get_multiplier(get_power(x, i, n))
+            counts += multiplier_counts
+            depth += multiplier_depth
+        qft_counts, qft_depth = get_qft(n_exponent_bits, approximation_degree)
+        counts += qft_counts
+        depth += qft_depth
+
+    return {'num_qubits': n_qubits,
+            'num_exponent_bits': n_exponent_bits,
+            'gate_counts': dict(counts),
+            'size': sum(counts.values()),
+            'depth': depth,
+            'statevector_bytes': BYTES_PER_AMPLITUDE * 2 ** n_qubits}
+
+
+# Get the constant x ** (2 ** i) % n multiplied in for exponent bit i, or None if x is unknown
+def get_power(x, i, n):
+    if x is None:
+        return None
+    return pow(x, 2 ** i, n)
+
+
+# Get the gate counts and depth of gates.QFT
+def get_qft(n_qubits, approximation_degree=None):
+    # Qubit i has a rotation from every lower qubit j with k = i - j + 1 kept
+    if approximation_degree is None or approximation_degree >= n_qubits:
+        n_rotations = n_qubits * (n_qubits - 1) // 2
+    else:
+        n_rotations = ((approximation_degree - 1) * (approximation_degree - 2) // 2
+                       + (n_qubits - approximation_degree + 1) * (approximation_degree - 1))
+
+    counts = collections.Counter({'h': n_qubits, 'cu1': n_rotations, 'swap': n_qubits // 2})
+    return (+counts, get_qft_depth(n_qubits, approximation_degree))
+
+
+# Get the depth of gates.QFT by scheduling each of its gates as early as its qubits allow
+def get_qft_depth(n_qubits, approximation_degree=None):
+    finish_times = [0] * n_qubits
+    for i in range(n_qubits - 1, -1, -1):
+        finish_times[i] += 1
+        for j in range(i - 1, -1, -1):
+            if not is_rotation_kept(i - j + 1, approximation_degree):
+                break
+            finish_times[i] = finish_times[j] = max(finish_times[i], finish_times[j]) + 1
+    # The final swaps act on disjoint pairs of qubits
+    for i in range(n_qubits // 2):
+        finish_times[i] = finish_times[n_qubits - 1 - i] = max(finish_times[i],
+                                                               finish_times[n_qubits - 1 - i]) + 1
+    return max(finish_times, default=0)
+
+
+# Get the number of rotations applied by gates.FixedQFTAdder on n_qubits qubits for the constant c,
+# or for the worst case if c is None.
+# Qubit n_qubits - 1 - p gets a rotation exactly when c has a set bit j with p - degree < j <= p,
+# so smearing each set bit of c over the next (degree - 1) positions marks all such qubits.
+def get_n_adder_rotations(n_qubits, c, approximation_degree=None):
+    if c is None:
+        return n_qubits
+    if approximation_degree is None:
+        approximation_degree = n_qubits
+    mask = c
+    shift = 1
+    while shift < approximation_degree:
+        step = min(shift, approximation_degree - shift)
+        mask |= mask << step
+        shift += step
+    return bin(mask & (2 ** n_qubits - 1)).count('1')
+
+
+# Computes gate counts and depths of the arithmetic circuits in gates.py for a fixed modulus,
+# remembering the results for constants seen before just as the gate cache does
+class ResourceEstimator:
+    def __init__(self, n_data_qubits, n, approximation_degree=None):
+        self.n_data_qubits = n_data_qubits
+        self.n = n
+        self.approximation_degree = approximation_degree
+        self.qft = get_qft(n_data_qubits + 1, approximation_degree)
+        self._adders = {}
+        self._partial_multipliers = {}
+
+    # Get the counts and depth of gates.CCModularFixedQFTAdder for the constant c
+    def get_adder(self, c):
+        if c not in self._adders:
+            n_adder_qubits = self.n_data_qubits + 1
+            n_c_rotations = get_n_adder_rotations(n_adder_qubits, c, self.approximation_degree)
+            n_n_rotations = get_n_adder_rotations(n_adder_qubits, self.n,
+                                                  self.approximation_degree)
+            qft_counts, qft_depth = self.qft
+
+            # Three doubly controlled adders of c, an adder and a controlled adder of n,
+            # four QFTs and the gates recording and clearing the carry
+            counts = collections.Counter({'mcu1': 3 * n_c_rotations,
+                                          'u1': n_n_rotations,
+                                          'cu1': n_n_rotations,
+                                          'cx': 2,
+                                          'x': 2})
+            for i in range(4):
+                counts += qft_counts
+            depth = (3 * n_c_rotations + min(n_n_rotations, 1) + n_n_rotations + 4 * qft_depth
+                     + 4)
+            self._adders[c] = (+counts, depth)
+        return self._adders[c]
+
+    # Get the counts and depth of gates.CPartialModularFixedMultiplier for the constant c
+    def get_partial_multiplier(self, c):
+        if c not in self._partial_multipliers:
+            qft_counts, qft_depth = self.qft
+            counts = qft_counts + qft_counts
+            depth = 2 * qft_depth
+            for i in range(self.n_data_qubits):
+                constant = None if c is None else 2 ** i * c % self.n
+                adder_counts, adder_depth = self.get_adder(constant)
+                counts += adder_counts
+                depth += adder_depth
+            self._partial_multipliers[c] = (counts, depth)
+        return self._partial_multipliers[c]
+
+    # Get the counts and depth of gates.CModularFixedMultiplier for the constant c
+    def get_multiplier(self, c):
+        c_inverse = None if c is None else get_modular_inverse(c, self.n)
+        multiplier_counts, multiplier_depth = self.get_partial_multiplier(c)
+        inverse_counts, inverse_depth = self.get_partial_multiplier(c_inverse)
+        counts = multiplier_counts + inverse_counts
+        counts['cswap'] += self.n_data_qubits
+        return (counts, multiplier_depth + inverse_depth + self.n_data_qubits)
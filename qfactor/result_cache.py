@@ -0,0 +1,149 @@
+import collections
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+from .version import __version__
+
+# Default location of the on-disk database
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'qfactor', 'results.sqlite3')
+
+# Seconds to wait for another process to release a lock on the database
+LOCK_TIMEOUT = 30
+
+
+# Persistent cache of the results of Shor's algorithm in a local SQLite database: the factors
+# found for each n and the order of each x relative to n. Both are facts that are checked
+# classically before they are returned, so they never expire, but results stored by other versions
+# of this package are ignored and eventually overwritten. The most recently used results are also
+# kept in memory. Every operation uses its own connection in a single transaction, so several
+# threads and processes can share the same database.
+class ResultCache:
+    def __init__(self, path=DEFAULT_PATH, max_memory_entries=1024):
+        if max_memory_entries % 1 != 0 or max_memory_entries < 0:
+            raise ValueError('Number of entries kept in memory must be a non-negative integer;'
+                             + f' found {max_memory_entries} instead')
+
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            # Readers do not block the writer (nor vice versa) in write-ahead logging mode
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS results'
+                               + ' (kind TEXT, key TEXT, version TEXT, value TEXT,'
+                               + ' PRIMARY KEY (kind, key))')
+
+    # Get the factors of n found before, or None if there are none
+    def get_factors(self, n):
+        factors = self._get('factors', str(n))
+        return None if factors is None else tuple(factors)
+
+    # Store the factors found for n
+    def put_factors(self, n, factors):
+        self._put('factors', str(n), list(factors))
+
+    # Get the order of x relative to n found before, or None if there is none
+    def get_order(self, x, n):
+        return self._get('order', f'{x},{n}')
+
+    # Store the order of x relative to n
+    def put_order(self, x, n, r):
+        self._put('order', f'{x},{n}', r)
+
+    # Remove all stored results
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._connect() as connection:
+            connection.execute('DELETE FROM results')
+
+    # Get the number of results stored in the database for the current version
+    def get_size(self):
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM results WHERE version = ?',
+                                      (__version__,)).fetchone()[0]
+
+    # Get the hit/miss statistics and current size of the cache
+    def get_stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'memory_hits': self.memory_hits,
+                'memory_entries': len(self._memory),
+                'size': self.get_size()}
+
+    # Get the value stored for a key, from memory if possible, or None if there is none
+    def _get(self, kind, key):
+        with self._lock:
+            if (kind, key) in self._memory:
+                self._memory.move_to_end((kind, key))
+                self.hits += 1
+                self.memory_hits += 1
+                return self._memory[(kind, key)]
+
+        with self._connect() as connection:
+            row = connection.execute('SELECT value FROM results'
+                                     + ' WHERE kind = ? AND key = ? AND version = ?',
+                                     (kind, key, __version__)).fetchone()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value = json.loads(row[0])
+            self.hits += 1
+            self._remember(kind, key, value)
+            return value
+
+    # Store a value for a key in the database and in memory
+    def _put(self, kind, key, value):
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                               (kind, key, __version__, json.dumps(value)))
+        with self._lock:
+            self._remember(kind, key, value)
+
+    # Keep a value in memory, forgetting the least recently used values beyond the limit
+    def _remember(self, kind, key, value):
+        self._memory[(kind, key)] = value
+        self._memory.move_to_end((kind, key))
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # Open a connection to the database which commits (or rolls back) and closes on exit
+    @contextlib.contextmanager
+    def _connect(self):
+        with contextlib.closing(sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)) as connection:
+            with connection:
+                yield connection
+
+
+# Cache of the results of Shor's algorithm, or None if caching is disabled (the default)
+default_cache = None
+
+
+# Enable the persistent result cache for all subsequent factorizations and order findings
+def enable_result_cache(path=DEFAULT_PATH, max_memory_entries=1024):
+    global default_cache
+    default_cache = ResultCache(path, max_memory_entries)
+    return default_cache
+
+
+# Disable the persistent result cache. Stored results are kept on disk.
+def disable_result_cache():
+    global default_cache
+    default_cache = None
+
+
+# Get the cache of the results of Shor's algorithm, or None if caching is disabled
+def get_result_cache():
+    return default_cache
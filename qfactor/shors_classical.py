@@ -1,12 +1,31 @@
+import multiprocessing
+import queue
 import random
 import math
 
-from .shors_quantum import get_order
+from .backends import get_backend
+from .budget import (budget_scope, charge_attempt, check_budget, get_budget,
+                     get_remaining_seconds, reserve_budget, BudgetExhausted)
+from .cancellation import check_cancelled, get_from_queue
+from .circuit_cache import enable_circuit_cache, get_circuit_cache
+from .instrumentation import emit
+from .result_cache import enable_result_cache, get_result_cache
 
 
 # Run the classical part of Shor's algorithm, with
-# the quantum part contained in a call to get_order().
-def run_shors_algorithm(n, p_min):
+# the quantum part contained in a call to the get_order() method of the backend.
+# The backend is a name or an instance as accepted by backends.get_backend(), and the
+# approximation degree and simulation method are passed on to it when given (backends that do
+# not simulate the circuit ignore them). If n_workers is greater than 1, attempts with different
+# random values of x are run in parallel in a pool of worker processes. Otherwise, if batch_size
+# is greater than 1, the orders for up to that many values of x are found together (see
+# backends.OrderFindingBackend.get_orders), which lets the Qiskit backend simulate their circuits
+# in a single job.
+# Within a budget scope (see budget.py), attempts and simulations are charged to the budget. Once
+# it is exhausted, the algorithm stops and returns None, and the confidence reached is recorded in
+# the budget.
+def run_shors_algorithm(n, p_min, approximation_degree=None, n_workers=None, backend=None,
+                        simulation_method=None, batch_size=None):
     # Ensure that n is an integer
     if n % 1 != 0:
         raise TypeError(f'Input must be an integer; found {n} instead')
@@ -15,34 +34,247 @@ def run_shors_algorithm(n, p_min):
     if not 0 <= p_min <= 1:
         raise ValueError(f'Minimum confidence must be in [0, 1]; found {p_min} instead')
 
+    # Ensure that the number of workers is a valid integer
+    if n_workers is not None and (n_workers % 1 != 0 or n_workers < 1):
+        raise ValueError(f'Number of workers must be a positive integer or None; found {n_workers}'
+                         + ' instead')
+
+    # Ensure that the batch size is a valid integer
+    if batch_size is not None and (batch_size % 1 != 0 or batch_size < 1):
+        raise ValueError(f'Batch size must be a positive integer or None; found {batch_size}'
+                         + ' instead')
+    if batch_size is None:
+        batch_size = 1
+
+    backend_options = {}
+    if approximation_degree is not None:
+        backend_options['approximation_degree'] = approximation_degree
+    if simulation_method is not None:
+        backend_options['simulation_method'] = simulation_method
+    backend = get_backend(backend, **backend_options)
+
+    if n_workers is not None and n_workers > 1:
+        return run_parallel_attempts(n, p_min, backend, n_workers)
+
     p = 0
-    while p < p_min:
-        # First step is to pick a random x
-        x = random.randrange(2, n)
-
-        # If x shares a non-trivial factor with n, we're already done
-        factor = math.gcd(x, n)
-        if factor != 1:
-            factors = [factor, n // factor]
-            factors.sort()
-            return tuple(factors)
-        else:
-            # Run the quantum part of the algorithm to get the order of x
-            r = get_order(x, n)
-            # The order is guaranteed to share a factor with n if these two conditions hold
-            if r % 2 == 0 and x ** (r // 2) % n != n - 1:
-                # Find the actual factors of n and return them
-                factor = math.gcd(x ** (r // 2) - 1, n)
-                factors = [factor, n // factor]
-                factors.sort()
-                return tuple(factors)
-            # Otherwise we build confidence that n is prime
-            else:
-                p = calculate_new_primality_confidence(p)
+    n_attempts = 0
+    factors = None
+    try:
+        while p < p_min:
+            # Stop here if the call was cancelled (see cancellation.py)
+            check_cancelled()
+
+            # First step is to pick random values of x for the next batch of attempts, no more
+            # than could be needed to reach the minimum confidence if they all fail, and as many
+            # as the budget allows
+            x_values = []
+            p_if_all_fail = p
+            while len(x_values) < batch_size and (not x_values or p_if_all_fail < p_min):
+                try:
+                    charge_attempt()
+                except BudgetExhausted:
+                    if not x_values:
+                        raise
+                    break
+                x_values.append(random.randrange(2, n))
+                p_if_all_fail = calculate_new_primality_confidence(p_if_all_fail)
+
+            for x, factors in zip(x_values, attempt_factorizations(x_values, n, backend)):
+                n_attempts += 1
+                emit('base_attempted', n=n, x=x, attempt=n_attempts, factors=factors)
+
+                if factors is not None:
+                    break
+                # Otherwise we build confidence that n is prime
+                else:
+                    p = calculate_new_primality_confidence(p)
+
+            if factors is not None:
+                break
+    except BudgetExhausted:
+        emit('budget_exhausted', n=n, limit=get_budget().exhausted_limit, confidence=p)
+
+    record_confidence(p)
+    emit('shors_algorithm_finished', n=n, attempts=n_attempts, factors=factors, confidence=p)
+    return factors
+
+
+# Try to factor n using the given value of x, finding its order with the given backend (the
+# default Qiskit backend if None). Returns the factors if found or None otherwise.
+def attempt_factorization(x, n, backend=None):
+    return attempt_factorizations([x], n, backend)[0]
+
+
+# Try to factor n using each of the given values of x as in attempt_factorization(), finding the
+# orders of all of them together. Returns a list of the factors found (or None) for each value.
+def attempt_factorizations(x_values, n, backend=None):
+    # If x shares a non-trivial factor with n, we're already done
+    results = [get_common_factors(x, n) for x in x_values]
+
+    # Run the quantum part of the algorithm to get the orders of the other values of x
+    pairs = [(x, n) for x, factors in zip(x_values, results) if factors is None]
+    orders = iter(get_backend(backend).get_orders(pairs) if pairs else [])
+
+    return [get_factors_from_order(x, n, next(orders)) if factors is None else factors
+            for x, factors in zip(x_values, results)]
+
+
+# Get the factors of n given by its greatest common divisor with x, or None if they are coprime
+def get_common_factors(x, n):
+    factor = math.gcd(x, n)
+    if factor != 1:
+        factors = [factor, n // factor]
+        factors.sort()
+        return tuple(factors)
+
+    return None
+
+
+# Get the factors of n revealed by the order r of x relative to n, or None if there are none
+def get_factors_from_order(x, n, r):
+    # The order is guaranteed to share a factor with n if these two conditions hold
+    # (a multiple of the order could also give x ** (r // 2) % n == 1, which reveals nothing)
+    if r % 2 == 0 and pow(x, r // 2, n) not in (1, n - 1):
+        # Find the actual factors of n and return them
+        factor = math.gcd(pow(x, r // 2, n) - 1, n)
+        factors = [factor, n // factor]
+        factors.sort()
+        return tuple(factors)
 
     return None
 
 
+# Create a pool of worker processes for Shor's algorithm. Workers are spawned rather than forked,
+# since forking after the simulator has started its threads can deadlock the children, so they do
+# not inherit the caches enabled in this process. The circuit cache (see circuit_cache) and the
+# result cache (see result_cache) are enabled in each worker with the same options instead, so
+# workers share circuits and orders through the cache directory and database.
+def create_pool(n_workers):
+    circuit_cache = get_circuit_cache()
+    circuit_cache_options = None
+    if circuit_cache is not None:
+        circuit_cache_options = (circuit_cache.directory, circuit_cache.max_size_bytes)
+
+    result_cache = get_result_cache()
+    result_cache_options = None
+    if result_cache is not None:
+        result_cache_options = (result_cache.path, result_cache.max_memory_entries)
+
+    return multiprocessing.get_context('spawn').Pool(n_workers, initialize_worker,
+                                                     (circuit_cache_options, result_cache_options))
+
+
+# Set up a worker process of a pool created by create_pool(), enabling the circuit and result
+# caches with the given options unless they are None
+def initialize_worker(circuit_cache_options, result_cache_options):
+    if circuit_cache_options is not None:
+        enable_circuit_cache(*circuit_cache_options)
+    if result_cache_options is not None:
+        enable_result_cache(*result_cache_options)
+
+
+# Run attempts with independent random values of x in a pool of worker processes, keeping one
+# attempt in flight per worker. The first factors found are returned, and leaving the pool
+# terminates the workers, cancelling the remaining attempts. Each failed attempt builds confidence
+# that n is prime exactly as in the serial loop.
+# Attempts are charged to the budget (if any) when they start, and once no more can be started,
+# those in flight are still waited for. Each attempt runs within its own share of the simulations
+# and shots left in the budget (see budget.Budget.reserve), so the attempts in flight can never use
+# more than the budget allows between them. The resources that they use are charged once they
+# finish.
+def run_parallel_attempts(n, p_min, backend, n_workers):
+    # Values of x and results (or exceptions) of finished attempts, in order of completion
+    results = queue.Queue()
+
+    p = 0
+    n_in_flight = 0
+    n_attempts = 0
+    factors = None
+    with create_pool(n_workers) as pool:
+        try:
+            while p < p_min:
+                # Start new attempts while workers are free, unless the attempts already in flight
+                # would reach the minimum confidence on their own by failing
+                while n_in_flight < n_workers:
+                    p_if_all_fail = p
+                    for i in range(n_in_flight):
+                        p_if_all_fail = calculate_new_primality_confidence(p_if_all_fail)
+                    if n_in_flight > 0 and p_if_all_fail >= p_min:
+                        break
+
+                    # Stop starting attempts once the budget is exhausted
+                    worker_budget = None
+                    try:
+                        worker_budget = reserve_budget(n_workers - n_in_flight)
+                        charge_attempt()
+                    except BudgetExhausted:
+                        # Give back the share reserved for the attempt, if any
+                        if worker_budget is not None:
+                            get_budget().release(worker_budget)
+                        if n_in_flight == 0:
+                            raise
+                        break
+
+                    x = random.randrange(2, n)
+                    pool.apply_async(attempt_factorization_within_budget,
+                                     (x, n, backend, worker_budget),
+                                     callback=lambda result, x=x: results.put((x, result)),
+                                     error_callback=lambda error, x=x: results.put((x, error)))
+                    n_in_flight += 1
+
+                # Wait for the next attempt to finish, unless the call is cancelled or the wall
+                # time of the budget runs out first
+                try:
+                    x, result = get_from_queue(results, get_remaining_seconds())
+                except queue.Empty:
+                    check_budget()
+                    raise
+                n_in_flight -= 1
+
+                if isinstance(result, BaseException):
+                    raise result
+
+                factors, worker_budget = result
+                if worker_budget is not None:
+                    get_budget().release(worker_budget)
+                    # An attempt stopped by its share of the budget says nothing about n
+                    if worker_budget.is_exhausted():
+                        continue
+                n_attempts += 1
+                emit('base_attempted', n=n, x=x, attempt=n_attempts, factors=factors)
+
+                if factors is not None:
+                    break
+                else:
+                    p = calculate_new_primality_confidence(p)
+        except BudgetExhausted:
+            emit('budget_exhausted', n=n, limit=get_budget().exhausted_limit, confidence=p)
+
+    record_confidence(p)
+    emit('shors_algorithm_finished', n=n, attempts=n_attempts, factors=factors, confidence=p)
+    return factors
+
+
+# Run attempt_factorization() in a worker process within the given budget reserved for it (or none
+# if it is None). Returns the factors (None also if the budget ran out first) and the budget, which
+# records the resources used.
+def attempt_factorization_within_budget(x, n, backend, budget):
+    with budget_scope(budget):
+        try:
+            factors = attempt_factorization(x, n, backend)
+        except BudgetExhausted:
+            factors = None
+    return factors, budget
+
+
+# Record the confidence that n is prime reached by Shor's algorithm in the budget running in this
+# thread, if any
+def record_confidence(p):
+    budget = get_budget()
+    if budget is not None:
+        budget.confidence = p
+
+
 # Calculate the new confidence in the primality of n based on the previous probability
 def calculate_new_primality_confidence(p):
     # Ensure that p can be interpreted as a probability
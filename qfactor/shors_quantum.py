@@ -1,46 +1,264 @@
+import fractions
 import math
 
-import qiskit
+from .arithmetic import get_lcm, get_min_n_bits_for_modulus, is_rotation_kept
+from .budget import charge_simulation
+from .cancellation import check_cancelled
+from .circuit_cache import get_circuit_cache
+from .instrumentation import emit, timed
+from .lattice import reduce_basis
+from .result_cache import get_result_cache
+from .simulation import get_basis_gates, get_run_options, get_simulation_method
+from .version import __version__
 
-from .gates import get_min_n_bits_for_modulus, ModularFixedExponentiator, QFT
+# Qiskit and the gates built with it take seconds to import, so they are only imported by the
+# functions below that build and simulate circuits for Aer, on first use. Likewise for numpy and
+# the numpy simulator. Factorizations that never find an order do not pay for either of them.
 
+# Names of the simulators that can be used to measure the value of c:
+# 'aer' runs the full circuit on Aer's qasm_simulator, while 'numpy' samples the exact
+# distribution of c computed from the structure of the circuit (see numpy_simulator).
+SIMULATORS = ('aer', 'numpy')
 
-# Get the order of x relative to n.
-# That is, find the smallest integer r > 0 such that x ** r % n == 1.
-def get_order(x, n):
-    # Ensure that n is a valid integer
-    if n % 1 != 0 or n < 3:
-        raise ValueError(f'n must be an integer greater than 2; found {n} instead')
-
-    # Ensure that x is a valid integer
-    if x % 1 != 0 or x < 2 or x >= n:
-        raise ValueError(f'x must be an integer in [2, n); found {x} instead')
-
-    # Determine the value of q, a power of 2 such that n ** 2 <= q < 2 * n ** 2
-    q = get_q(n)
+# Largest multiple of each order candidate that is tried before giving up on the candidate
+MAX_CANDIDATE_MULTIPLE = 6
 
-    print(f'Attempting to find the order of {x} relative to {n}...')
+# Largest number of the most recent measured values combined to find the order when the exponent
+# register is reduced (see get_lattice_candidates)
+MAX_COMBINED_MEASUREMENTS = 8
 
-    while True:
-        # Run the quantum circuit experiment to get a measured value
-        c = get_c(x, n, q)
 
-        print(f'Quantum circuit measurement led to a value of {c}.')
-
-        if c == 0:
-            print('Zero value does not allow for estimation of the order. Retrying...')
-
-        # Try to figure out the order by assuming c / q = d / r for some integer d
-        r_candidate = find_nearest_fraction(c / q, n - 1)[1]
+# Get the order of x relative to n.
+# That is, find the smallest integer r > 0 such that x ** r % n == 1.
+# Each simulation of the quantum circuit is run with the given number of shots, and all of the
+# measured values are tried (most frequent first) before the circuit is simulated again.
+# If semiclassical is True, the Aer simulation uses the semi-classical QFT circuit, which needs
+# far fewer qubits (see build_semiclassical_circuit). If an approximation degree is given, the Aer
+# simulation drops all R_k rotations with k greater than it (see gates.QFT). The Aer simulation
+# runs on the Aer backend with the given name, using the given simulation method or, if None, the
+# cheapest one for the size of the circuit (see simulation.get_simulation_method), and with at
+# most n_threads threads (all available threads if None).
+# By default the exponent register has enough qubits for q >= n ** 2, so that a single measured
+# value determines the order. A smaller number of exponent bits can be given instead, which shrinks
+# the statevector exponentially. Each measured value then carries less information, so several of
+# them are combined to recover the order (see get_lattice_candidates), at the cost of more runs.
+def get_order(x, n, shots=8, simulator='aer', semiclassical=False, approximation_degree=None,
+              backend_name='qasm_simulator', n_exponent_bits=None, simulation_method=None,
+              n_threads=None):
+    return get_orders([(x, n)], shots, simulator, semiclassical, approximation_degree,
+                      backend_name, n_exponent_bits, simulation_method, n_threads)[0]
+
+
+# Get the orders of several values of x relative to their moduli n, given as (x, n) pairs, in the
+# same way as get_order(). The circuits for all of the orders not found yet are simulated together
+# as one batch, which the Aer simulation submits as a single job, running its experiments in
+# parallel. Returns the orders in the same order as the pairs.
+def get_orders(pairs, shots=8, simulator='aer', semiclassical=False, approximation_degree=None,
+               backend_name='qasm_simulator', n_exponent_bits=None, simulation_method=None,
+               n_threads=None):
+    for x, n in pairs:
+        # Ensure that n is a valid integer
+        if n % 1 != 0 or n < 3:
+            raise ValueError(f'n must be an integer greater than 2; found {n} instead')
+
+        # Ensure that x is a valid integer
+        if x % 1 != 0 or x < 2 or x >= n:
+            raise ValueError(f'x must be an integer in [2, n); found {x} instead')
+
+    # Ensure that the number of shots is a valid integer
+    if shots % 1 != 0 or shots < 1:
+        raise ValueError(f'shots must be a positive integer; found {shots} instead')
+
+    # Ensure that the simulator is known
+    if simulator not in SIMULATORS:
+        raise ValueError(f'simulator must be one of {SIMULATORS}; found {simulator} instead')
+
+    # Ensure that the approximation degree is a valid integer
+    if approximation_degree is not None and (approximation_degree % 1 != 0
+                                             or approximation_degree < 1):
+        raise ValueError('Approximation degree must be a positive integer or None;'
+                         + f' found {approximation_degree} instead')
+
+    # Ensure that the number of exponent bits is a valid integer
+    if n_exponent_bits is not None and (n_exponent_bits % 1 != 0 or n_exponent_bits < 1):
+        raise ValueError('Number of exponent bits must be a positive integer or None;'
+                         + f' found {n_exponent_bits} instead')
+
+    # Ensure that q = 2 ** n_exponent_bits exceeds n, without which the measured values cannot
+    # determine the order
+    for x, n in pairs:
+        if n_exponent_bits is not None and n_exponent_bits <= int(n).bit_length():
+            raise ValueError('Number of exponent bits must be greater than the'
+                             + f' {int(n).bit_length()} bits of n = {n}; found {n_exponent_bits}'
+                             + ' instead')
+
+    # Ensure that the simulation options are valid before any circuit is built
+    if simulation_method is not None:
+        get_simulation_method(0, simulation_method)
+    get_run_options(simulation_method, n_threads)
+
+    orders = {}
+    finders = []
+    for x, n in dict.fromkeys(pairs):
+        # Determine the value of q, a power of 2 such that n ** 2 <= q < 2 * n ** 2 by default
+        if n_exponent_bits is None:
+            q = get_q(n)
+        else:
+            q = 2 ** n_exponent_bits
 
-        print(f'By continued fraction expansion, this suggests an order of {r_candidate}.')
+        emit('order_finding_started', x=x, n=n, q=q)
 
-        # Check whether this is actually the order of x. Otherwise try again.
-        if x ** r_candidate % n == 1:
-            print(f'Verified that {r_candidate} is the order of {x} relative to {n}.')
-            return r_candidate
+        # Orders found before are looked up in the result cache if it is enabled (see
+        # result_cache)
+        result_cache = get_result_cache()
+        r = None if result_cache is None else result_cache.get_order(x, n)
+        if r is not None:
+            emit('order_found', x=x, n=n, r=r, simulations=0, candidates=0)
+            orders[(x, n)] = r
         else:
-            print(f'{r_candidate} is not the order of {x} relative to {n}. Retrying...')
+            finders.append(OrderFinder(x, n, q))
+
+    while finders:
+        # Stop here if the call was cancelled (see cancellation.py) or the simulations would
+        # exceed the budget of the factorization (see budget.py)
+        check_cancelled()
+        for finder in finders:
+            charge_simulation(shots)
+
+        # Run the quantum circuit experiments to get a batch of measured values for each order
+        experiments = [(finder.x, finder.n, finder.q) for finder in finders]
+        c_value_batches = get_c_value_batches(experiments, shots, simulator, semiclassical,
+                                              approximation_degree, backend_name,
+                                              simulation_method, n_threads)
+        for finder, c_values in zip(finders, c_value_batches):
+            r = finder.add_measured_values(c_values)
+            if r is not None:
+                orders[(finder.x, finder.n)] = r
+        finders = [finder for finder in finders if (finder.x, finder.n) not in orders]
+
+    return [orders[pair] for pair in pairs]
+
+
+# Finds the order of x relative to n from the values measured by successive simulations of the
+# circuit, remembering what previous values revealed about the order
+class OrderFinder:
+    def __init__(self, x, n, q):
+        self.x = x
+        self.n = n
+        self.q = q
+        self.is_reduced = q < get_q(n)
+
+        # Number of times the circuit was simulated and number of order candidates checked
+        self.n_simulations = 0
+        self.n_candidates = 0
+
+        # Least common multiple of all candidates which were not the order. Each of them is likely
+        # a divisor of the order (whenever d and r share a factor), so their LCM is as well.
+        self.combined_candidate = 1
+
+        # Nonzero values measured so far, which are combined if the exponent register is reduced
+        self.measured_values = []
+
+    # Try the values measured by one simulation of the circuit, most frequent first.
+    # Returns the order if it was found or None otherwise.
+    def add_measured_values(self, c_values):
+        x, n, q = self.x, self.n, self.q
+        self.n_simulations += 1
+        for c in c_values:
+            emit('c_measured', x=x, n=n, c=c)
+
+            # Zero value does not allow for estimation of the order
+            if c == 0:
+                continue
+
+            # Try to figure out the order by assuming c / q = d / r for some integer d
+            r_candidate = find_best_fraction(c, q, n - 1)[1]
+            r_candidates = [r_candidate]
+
+            # With a reduced exponent register, also look for orders consistent with all of the
+            # latest measured values at once
+            if self.is_reduced:
+                self.measured_values.append(c)
+                for lattice_candidate in get_lattice_candidates(
+                        self.measured_values[-MAX_COMBINED_MEASUREMENTS:], q, n):
+                    if lattice_candidate not in r_candidates:
+                        r_candidates.append(lattice_candidate)
+
+            # Check whether each candidate, its LCM with previous candidates, or a small multiple
+            # of either is actually the order of x. Otherwise keep it and try the next value.
+            for candidate in r_candidates:
+                for r in get_order_candidates(candidate, self.combined_candidate, n):
+                    self.n_candidates += 1
+                    verified = pow(x, r, n) == 1
+                    emit('order_candidate', x=x, n=n, c=c, r_candidate=r, verified=verified)
+                    if verified:
+                        # A multiple of the order may have been found, so reduce it to the order
+                        r = reduce_order(x, n, r)
+                        result_cache = get_result_cache()
+                        if result_cache is not None:
+                            result_cache.put_order(x, n, r)
+                        emit('order_found', x=x, n=n, r=r, simulations=self.n_simulations,
+                             candidates=self.n_candidates)
+                        return r
+
+            # Spurious candidates from unlikely measurements can make the LCM too large to be the
+            # order, in which case it is not updated
+            if get_lcm(self.combined_candidate, r_candidate) < n:
+                self.combined_candidate = get_lcm(self.combined_candidate, r_candidate)
+
+        return None
+
+
+# Find candidates for the order from several measured values at once (Seifert's simultaneous
+# Diophantine approximation). For the true order r, each r * c_j is close to a multiple d_j * q,
+# so the vector (r, r * c_1 - d_1 * q, ..., r * c_t - d_t * q) is unusually short in the lattice
+# spanned by (1, c_1, ..., c_t) and q times each unit vector after the first. Its first component
+# is then found among the vectors of the reduced basis. This works with far fewer exponent bits per
+# measurement than continued fractions, roughly once t * (log2(q) - log2(n)) exceeds log2(n).
+def get_lattice_candidates(c_values, q, n):
+    candidates = []
+    for n_values in range(2, len(c_values) + 1):
+        values = c_values[-n_values:]
+        basis = [[1] + list(values)]
+        for i in range(n_values):
+            basis.append([0] * (1 + i) + [q] + [0] * (n_values - 1 - i))
+        for vector in reduce_basis(basis):
+            candidate = abs(vector[0])
+            if 0 < candidate < n and candidate not in candidates:
+                candidates.append(candidate)
+    return candidates
+
+
+# Generate the distinct values worth checking as the order of x given a new candidate and the LCM
+# of all previous candidates: the candidate, its LCM with the previous candidates, and multiples of
+# both up to MAX_CANDIDATE_MULTIPLE. Values of n or more cannot be the order and are skipped.
+def get_order_candidates(r_candidate, combined_candidate, n):
+    checked = set()
+    bases = [r_candidate, get_lcm(r_candidate, combined_candidate)]
+    for multiple in range(1, MAX_CANDIDATE_MULTIPLE + 1):
+        for base in bases:
+            r = multiple * base
+            if r < n and r not in checked:
+                checked.add(r)
+                yield r
+
+
+# Reduce a multiple r of the order of x to the order itself by dividing out each prime factor of r
+# for as long as x ** r % n == 1 still holds
+def reduce_order(x, n, r):
+    remaining = r
+    factor = 2
+    while factor * factor <= remaining:
+        if remaining % factor == 0:
+            while remaining % factor == 0:
+                remaining //= factor
+            while r % factor == 0 and pow(x, r // factor, n) == 1:
+                r //= factor
+        factor += 1
+    # Whatever remains is a prime factor
+    if remaining > 1 and pow(x, r // remaining, n) == 1:
+        r //= remaining
+    return r
 
 
 # Return the value of q
@@ -49,20 +267,180 @@ def get_q(n):
 
 
 # Return the value of c
-def get_c(x, n, q):
+def get_c(x, n, q, simulator='aer', semiclassical=False, approximation_degree=None):
     # Run quantum circuit and get a single measurement
-    result = get_circuit_result(x, n, q, 1)
-
-    # get_counts() returns a dictionary. The single key is a string of a binary number.
-    binary_representation = list(result.get_counts())[0]
+    return get_c_values(x, n, q, 1, simulator, semiclassical, approximation_degree)[0]
+
+
+# Return the distinct values of c measured over the given number of shots,
+# ordered from most to least frequent
+def get_c_values(x, n, q, shots, simulator='aer', semiclassical=False,
+                 approximation_degree=None, backend_name='qasm_simulator',
+                 simulation_method=None, n_threads=None):
+    return get_c_value_batches([(x, n, q)], shots, simulator, semiclassical, approximation_degree,
+                               backend_name, simulation_method, n_threads)[0]
+
+
+# Return the distinct values of c measured for each of several (x, n, q) experiments as in
+# get_c_values(), simulating all of the circuits in one job for the Aer simulation
+def get_c_value_batches(experiments, shots, simulator='aer', semiclassical=False,
+                        approximation_degree=None, backend_name='qasm_simulator',
+                        simulation_method=None, n_threads=None):
+    if simulator == 'aer':
+        # Run quantum circuits and get all measurements
+        result = get_circuit_results(experiments, shots, semiclassical, approximation_degree,
+                                     backend_name, simulation_method, n_threads)
+
+        # get_counts() returns a dictionary for each circuit. Each key is a string of a binary
+        # number (with spaces between classical registers), and each value is the number of times
+        # that it was measured. Convert to integer representations.
+        count_batches = [{int(binary_representation.replace(' ', ''), 2): count
+                          for binary_representation, count in result.get_counts(i).items()}
+                         for i in range(len(experiments))]
+    elif simulator == 'numpy':
+        from . import numpy_simulator
+
+        # Sample from the exact distribution without simulating the full circuit
+        count_batches = []
+        for x, n, q in experiments:
+            with timed('circuit_simulated', x=x, n=n, shots=shots, simulator=simulator):
+                count_batches.append(numpy_simulator.get_counts(x, n, q, shots))
+    else:
+        raise ValueError(f'simulator must be one of {SIMULATORS}; found {simulator} instead')
 
-    # Convert to an integer representation of the measurement and return it
-    c = int(binary_representation, 2)
-    return c
+    return [sorted(counts, key=counts.get, reverse=True) for counts in count_batches]
 
 
 # Simulate the quantum circuit that measures the value of c
-def get_circuit_result(x, n, q, shots):
+def get_circuit_result(x, n, q, shots, semiclassical=False, approximation_degree=None,
+                       backend_name='qasm_simulator', simulation_method=None, n_threads=None):
+    return get_circuit_results([(x, n, q)], shots, semiclassical, approximation_degree,
+                               backend_name, simulation_method, n_threads)
+
+
+# Simulate the quantum circuits that measure the value of c for several (x, n, q) experiments in a
+# single job, letting Aer run the experiments in parallel. The counts of experiment i are given by
+# get_counts(i) of the result.
+def get_circuit_results(experiments, shots, semiclassical=False, approximation_degree=None,
+                        backend_name='qasm_simulator', simulation_method=None, n_threads=None):
+    import qiskit
+
+    # Get simulation backend
+    backend = qiskit.Aer.get_backend(backend_name)
+
+    # Choose how to simulate the circuits from the largest of them
+    num_qubits = max(get_num_qubits(n, q, semiclassical) for x, n, q in experiments)
+    simulation_method = get_simulation_method(num_qubits, simulation_method)
+
+    # Get the circuits, already transpiled for the backend and the simulation method
+    circuits = get_transpiled_circuits(experiments, backend, semiclassical, approximation_degree,
+                                       simulation_method)
+
+    # Building the circuits can take a while, so check for cancellation again before running them
+    check_cancelled()
+
+    run_options = get_run_options(simulation_method, n_threads, len(circuits))
+
+    # Run circuits and retrieve final measurement results from simulation
+    with timed('circuit_simulated', **get_event_data(experiments), shots=shots, simulator='aer',
+               simulation_method=simulation_method):
+        job = backend.run(qiskit.assemble(circuits, backend, shots=shots, **run_options))
+        result = job.result()
+
+    return result
+
+
+# Get the quantum circuit that measures the value of c, transpiled for the given backend and
+# simulation method (see simulation.get_basis_gates).
+# If the on-disk circuit cache is enabled (see circuit_cache), both the built and the transpiled
+# circuits are looked up there first and stored there once made. Built circuits are optimized
+# (see optimization.optimize_circuit) before they are cached or transpiled.
+def get_transpiled_circuit(x, n, q, backend, semiclassical=False, approximation_degree=None,
+                           simulation_method='statevector'):
+    return get_transpiled_circuits([(x, n, q)], backend, semiclassical, approximation_degree,
+                                   simulation_method)[0]
+
+
+# Get the transpiled circuits for several (x, n, q) experiments as in get_transpiled_circuit().
+# All of the circuits which are not cached are transpiled together, which Qiskit parallelizes.
+def get_transpiled_circuits(experiments, backend, semiclassical=False, approximation_degree=None,
+                            simulation_method='statevector'):
+    import qiskit
+
+    from .optimization import optimize_circuit
+
+    cache = get_circuit_cache()
+
+    transpiled_circuits = [None] * len(experiments)
+    untranspiled = []
+    for i, (x, n, q) in enumerate(experiments):
+        # Circuits depend on the versions of the code that made them as well as on their
+        # parameters. Cached circuits are always optimized (see optimization.optimize_circuit).
+        circuit_key = ('optimized_circuit', __version__, qiskit.__version__,
+                       x, n, q, semiclassical, approximation_degree)
+        transpiled_circuit_key = circuit_key + (backend.name(), simulation_method)
+
+        circuit = None
+        if cache is not None:
+            transpiled_circuits[i] = cache.get(transpiled_circuit_key)
+            if transpiled_circuits[i] is not None:
+                continue
+            circuit = cache.get(circuit_key)
+
+        # Build the circuit
+        if circuit is None:
+            with timed('circuit_built', x=x, n=n):
+                if semiclassical:
+                    circuit = build_semiclassical_circuit(x, n, q, approximation_degree)
+                else:
+                    circuit = build_circuit(x, n, q, approximation_degree)
+
+            # Fuse the gates of the flattened circuit to reduce its size before transpilation
+            with timed('circuit_optimized', x=x, n=n):
+                circuit = optimize_circuit(circuit)
+
+            if cache is not None:
+                cache.put(circuit_key, circuit)
+
+        untranspiled.append((i, circuit, transpiled_circuit_key))
+
+    # Transpile the circuits for the backend
+    if untranspiled:
+        event_data = get_event_data([experiments[i] for i, circuit, key in untranspiled])
+        with timed('circuit_transpiled', **event_data):
+            circuits = qiskit.transpile([circuit for i, circuit, key in untranspiled], backend,
+                                        basis_gates=get_basis_gates(simulation_method))
+        for j, (i, circuit, transpiled_circuit_key) in enumerate(untranspiled):
+            transpiled_circuits[i] = circuits[j]
+            if cache is not None:
+                cache.put(transpiled_circuit_key, circuits[j])
+
+    return transpiled_circuits
+
+
+# Get the values of x and n reported in the events of a batch of (x, n, q) experiments: single
+# values for a single experiment or else lists with the values of every experiment
+def get_event_data(experiments):
+    if len(experiments) == 1:
+        x, n, q = experiments[0]
+        return {'x': x, 'n': n}
+    return {'x': [x for x, n, q in experiments], 'n': [n for x, n, q in experiments]}
+
+
+# Get the number of qubits of the circuit that measures the value of c (see build_circuit and
+# build_semiclassical_circuit)
+def get_num_qubits(n, q, semiclassical=False):
+    if semiclassical:
+        return 1 + 2 * get_min_n_bits_for_modulus(n) + 2
+    return get_min_n_bits_for_modulus(q) + 2 * get_min_n_bits_for_modulus(n) + 2
+
+
+# Build the quantum circuit that measures the value of c
+def build_circuit(x, n, q, approximation_degree=None):
+    import qiskit
+
+    from .gates import ModularFixedExponentiator, QFT
+
     # Exponent and final result register
     first_register = qiskit.QuantumRegister(get_min_n_bits_for_modulus(q))
 
@@ -84,70 +462,155 @@ def get_circuit_result(x, n, q, shots):
     circuit.h(first_register)
 
     # Exponentiate x by the first register, modulo n, and store the result in the second register
-    circuit.append(ModularFixedExponentiator(first_register.size, second_register.size, x, n),
+    circuit.append(ModularFixedExponentiator(first_register.size, second_register.size, x, n,
+                                             approximation_degree),
                    circuit.qubits)
 
     # Apply a QFT
-    circuit.append(QFT(first_register.size), first_register)
+    circuit.append(QFT(first_register.size, approximation_degree), first_register)
 
     # Measure the first register
     circuit.measure(first_register, measurement_register)
 
-    # Get simulation backend
-    backend = qiskit.Aer.get_backend('qasm_simulator')
+    return circuit
 
-    # Run circuit
-    job = qiskit.execute(circuit, backend, shots=shots)
 
-    # Retrieve and return final measurement results from simulation
-    result = job.result()
-    return result
+# Build a circuit that measures the value of c using a semi-classical QFT (Griffiths and Niu),
+# following Beauregard's 2n + 3 qubit construction. A single control qubit is recycled in place of
+# the whole exponent register. The controlled rotations of the QFT are diagonal, so they commute
+# with measurement of their control qubits. Each exponent bit can therefore be measured as soon as
+# it is finished, and its rotations applied to the remaining bits as classically conditioned
+# gates. This produces the same distribution of c as build_circuit().
+def build_semiclassical_circuit(x, n, q, approximation_degree=None):
+    import qiskit
 
+    from .gates import get_gate, CModularFixedMultiplier, Rk
 
-# Construct the continued fraction expansion of a number and find the closest rational
-# approximation up to a maximum denominator. Returns the (numerator, denominator) pair.
-def find_nearest_fraction(original_number, max_denominator):
-    if original_number < 0:
-        raise ValueError('Original number must be greater than or equal to 0;'
-                         + f' found {original_number} instead')
+    n_exponent_bits = get_min_n_bits_for_modulus(q)
+
+    # Single control qubit standing in for each exponent qubit in turn
+    control_register = qiskit.QuantumRegister(1)
+
+    # Register for exponentiation result
+    second_register = qiskit.QuantumRegister(get_min_n_bits_for_modulus(n))
+
+    # Ancilla qubits for modular additions and multiplications
+    ancilla_register = qiskit.QuantumRegister(get_min_n_bits_for_modulus(n) + 2)
 
+    # Each measured bit is stored in its own register of one classical bit so that later gates can
+    # be conditioned on it. Bit i of c is stored in measurement_registers[i].
+    measurement_registers = [qiskit.ClassicalRegister(1) for i in range(n_exponent_bits)]
+    circuit = qiskit.QuantumCircuit(control_register,
+                                    second_register,
+                                    ancilla_register,
+                                    *measurement_registers)
+
+    control = control_register[0]
+
+    # Initialize result register to 1 before any multiplication
+    circuit.x(second_register[0])
+
+    # The QFT finishes the most significant exponent qubit first, so go through them in that order.
+    # The QFT ends by reversing the qubits, so exponent qubit i is measured into bit
+    # n_exponent_bits - 1 - i of c.
+    for i in range(n_exponent_bits - 1, -1, -1):
+        # Recycle the control qubit after the first exponent bit
+        if i < n_exponent_bits - 1:
+            circuit.reset(control)
+
+        # Prepare the control qubit in an equal superposition, as with the full exponent register
+        circuit.h(control)
+
+        # Multiply by x ** (2 ** i), controlled by the current exponent bit
+        circuit.append(get_gate(CModularFixedMultiplier, second_register.size, pow(x, 2 ** i, n),
+                                n, approximation_degree),
+                       circuit.qubits)
+
+        # Apply the rotations of the QFT controlled by the exponent bits that are already measured
+        for j in range(n_exponent_bits - 1, i, -1):
+            if not is_rotation_kept(j - i + 1, approximation_degree):
+                continue
+            circuit.append(Rk(j - i + 1), [control]).c_if(
+                measurement_registers[n_exponent_bits - 1 - j], 1)
+
+        # Finish the QFT on this exponent bit and measure it
+        circuit.h(control)
+        circuit.measure(control, measurement_registers[n_exponent_bits - 1 - i][0])
+
+    return circuit
+
+
+# Generate the convergents of the continued fraction expansion of numerator / denominator as
+# (numerator, denominator) pairs, using exact integer arithmetic and the standard recurrences.
+# Each convergent takes constant work, so the whole expansion takes O(log(denominator)) steps.
+def get_convergents(numerator, denominator):
+    # Ensure that the inputs are valid integers
+    if numerator % 1 != 0 or numerator < 0:
+        raise ValueError('Numerator must be a non-negative integer;'
+                         + f' found {numerator} instead')
+
+    if denominator % 1 != 0 or denominator < 1:
+        raise ValueError(f'Denominator must be a positive integer; found {denominator} instead')
+
+    # The two previous convergents, starting from the conventional 0 / 1 and 1 / 0
+    previous_numerator, current_numerator = 0, 1
+    previous_denominator, current_denominator = 1, 0
+
+    while denominator != 0:
+        # Take the next integer of the expansion and continue with the remainder
+        integer_part, remainder = divmod(numerator, denominator)
+        numerator, denominator = denominator, remainder
+
+        previous_numerator, current_numerator = (current_numerator,
+                                                 integer_part * current_numerator
+                                                 + previous_numerator)
+        previous_denominator, current_denominator = (current_denominator,
+                                                     integer_part * current_denominator
+                                                     + previous_denominator)
+        yield (current_numerator, current_denominator)
+
+
+# Find the closest fraction to numerator / denominator with a denominator no larger than the max,
+# considering both convergents and semiconvergents. Returns the (numerator, denominator) pair.
+def find_best_fraction(numerator, denominator, max_denominator):
     if max_denominator < 1:
         raise ValueError('Max denominator must be greater than or equal to 1;'
                          + f' found {max_denominator} instead')
+    max_denominator = math.floor(max_denominator)
+
+    # The two previous convergents, starting from the conventional 0 / 1 and 1 / 0
+    previous_fraction, fraction = (0, 1), (1, 0)
+    for convergent in get_convergents(numerator, denominator):
+        if convergent[1] > max_denominator:
+            # The best approximation is either the last convergent or the semiconvergent with the
+            # largest denominator below the max, built from the two last convergents
+            steps = (max_denominator - previous_fraction[1]) // fraction[1]
+            semiconvergent = (previous_fraction[0] + steps * fraction[0],
+                              previous_fraction[1] + steps * fraction[1])
+            # Compare distances |a / b - numerator / denominator| exactly, preferring the
+            # convergent in case of a tie
+            convergent_error = abs(fraction[0] * denominator - numerator * fraction[1])
+            semiconvergent_error = abs(semiconvergent[0] * denominator
+                                       - numerator * semiconvergent[1])
+            if semiconvergent_error * fraction[1] < convergent_error * semiconvergent[1]:
+                return semiconvergent
+            return fraction
+        previous_fraction, fraction = fraction, convergent
+
+    # The expansion terminated within the max denominator, so the fraction is exact
+    return fraction
+
+
+# Find the closest rational approximation of a number up to a maximum denominator.
+# Returns the (numerator, denominator) pair.
+def find_nearest_fraction(original_number, max_denominator):
+    if original_number < 0:
+        raise ValueError('Original number must be greater than or equal to 0;'
+                         + f' found {original_number} instead')
 
-    # Initialize the list holding the integers of the continued fraction expansion
-    expansion = []
-    current_number = original_number
-    while True:
-        # Break into integer and fractional components
-        integer_part = math.floor(current_number)
-        fractional_part = current_number % 1
-
-        # Store the next number in the expansion
-        expansion.append(integer_part)
-
-        # Stop if fractional part is 0 (expansion is exact) or if overall denominator exceeds max
-        if fractional_part < 1e-9 or get_fraction(expansion)[1] >= max_denominator:
-            break
-        else:
-            # Run next iteration with reciprocal of current fractional component
-            current_number = fractional_part ** -1
-
-    # If the overall denominator is larger than the max, we need to backtrack a bit
-    if get_fraction(expansion)[1] > max_denominator:
-        # Start from the third to last fraction representation
-        fraction_to_return = list(get_fraction(expansion[:-2]))
-        second_to_last_fraction = get_fraction(expansion[:-1])
-        # Add the second to last numerator and denominator to the third to last numerator and
-        # denominator, respectively, until we reach the largest denominator below the max
-        while fraction_to_return[1] + second_to_last_fraction[1] <= max_denominator:
-            fraction_to_return[0] += second_to_last_fraction[0]
-            fraction_to_return[1] += second_to_last_fraction[1]
-        # Return this best fractional approximation
-        return tuple(fraction_to_return)
-    # Otherwise just return the fraction for the full expansion
-    else:
-        return get_fraction(expansion)
+    # Floats are converted exactly into a ratio of integers
+    exact_number = fractions.Fraction(original_number)
+    return find_best_fraction(exact_number.numerator, exact_number.denominator, max_denominator)
 
 
 # Convert a continued fraction expansion into a simple fraction with an integer numerator and
@@ -156,16 +619,15 @@ def get_fraction(expansion):
     # Expansion should not be empty
     if len(expansion) == 0:
         raise IndexError('Continued fraction expansion cannot be empty')
-    elif len(expansion) == 1:
+
+    # Unroll the continued fraction from the innermost level outwards, starting from the last
+    # integer as a fraction with a denominator of 1
+    fraction = (1, 0)
+    for integer_part in reversed(expansion):
         # All elements should be integers
-        if expansion[0] % 1 != 0:
+        if integer_part % 1 != 0:
             raise ValueError('Continued fraction expansion must be composed of integers;'
-                             + f' found {expansion[0]} instead')
+                             + f' found {integer_part} instead')
 
-        # Integers are their own one-element expansion.
-        # Turn them into a fraction with a denominator of 1
-        return (expansion[0], 1)
-    else:
-        # Recursively unroll the continued fraction, combining each level into a single fraction
-        nested_fraction = get_fraction(expansion[1:])
-        return (expansion[0] * nested_fraction[0] + nested_fraction[1], nested_fraction[0])
+        fraction = (integer_part * fraction[0] + fraction[1], fraction[0])
+    return fraction
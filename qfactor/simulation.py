@@ -0,0 +1,96 @@
+import os
+
+# Bytes per amplitude of a double precision complex statevector
+BYTES_PER_AMPLITUDE = 16
+
+# Names of the Aer simulation methods that can be selected for the full circuit simulation.
+# 'statevector' is exact and fastest while the whole statevector fits in memory.
+# 'matrix_product_state' stores the state as a chain of tensors whose size grows with the
+# entanglement between qubits rather than with the number of qubits.
+# 'extended_stabilizer' is only efficient for circuits with few non-Clifford gates, which the
+# order-finding circuits are not (nearly all of their gates are arbitrary phase rotations), so it
+# is never chosen automatically.
+SIMULATION_METHODS = ('statevector', 'matrix_product_state', 'extended_stabilizer')
+
+# Gates that circuits are decomposed into for the simulation methods other than 'statevector',
+# which do not support all of the gates of the qasm_simulator basis (such as the multi-controlled
+# rotations 'mcu1' and 'cswap'). All of these methods support this basis.
+DECOMPOSED_BASIS_GATES = ('u1', 'u2', 'u3', 'cx')
+
+# Largest fraction of the available memory that a statevector may take up
+MAX_MEMORY_FRACTION = 0.5
+
+# Largest number of qubits simulated as a statevector when the available memory is unknown
+DEFAULT_MAX_STATEVECTOR_QUBITS = 28
+
+
+# Choose the cheapest Aer simulation method for a circuit with the given number of qubits, or
+# validate the method if one is given. The statevector method is used whenever its memory fits
+# within MAX_MEMORY_FRACTION of the available memory (in bytes, found from the system if None).
+# Larger circuits are simulated as matrix product states. For order finding, the exponent
+# register is only entangled with the rest through the r < n values of x ** a % n, so the bond
+# dimensions, and hence the memory, stay far below those of a statevector of the same size.
+def get_simulation_method(num_qubits, simulation_method=None, available_memory=None):
+    if simulation_method is not None:
+        # Ensure that the method is known
+        if simulation_method not in SIMULATION_METHODS:
+            raise ValueError(f'Simulation method must be one of {SIMULATION_METHODS} or None;'
+                             + f' found {simulation_method} instead')
+        return simulation_method
+
+    if available_memory is None:
+        available_memory = get_available_memory()
+
+    if available_memory is None:
+        fits_in_memory = num_qubits <= DEFAULT_MAX_STATEVECTOR_QUBITS
+    else:
+        statevector_bytes = BYTES_PER_AMPLITUDE * 2 ** num_qubits
+        fits_in_memory = statevector_bytes <= MAX_MEMORY_FRACTION * available_memory
+
+    if fits_in_memory:
+        return 'statevector'
+    return 'matrix_product_state'
+
+
+# Get the basis gates that circuits must be transpiled into for the given simulation method, or
+# None for the basis of the backend itself
+def get_basis_gates(simulation_method):
+    if simulation_method == 'statevector':
+        return None
+    return list(DECOMPOSED_BASIS_GATES)
+
+
+# Get the physical memory currently available in bytes, or None if it cannot be determined on this
+# system. On Linux, this is MemAvailable from /proc/meminfo, which unlike the free memory also
+# counts the page cache that can be reclaimed.
+def get_available_memory():
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    # The value is given in kibibytes
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+# Get the options that configure an Aer simulation with the given method and number of threads,
+# as accepted by qiskit.assemble(). Aer uses all available threads if n_threads is None. Jobs with
+# several experiments let Aer run as many of them in parallel as its threads and memory allow.
+def get_run_options(simulation_method, n_threads=None, n_experiments=1):
+    # Ensure that the number of threads is a valid integer
+    if n_threads is not None and (n_threads % 1 != 0 or n_threads < 1):
+        raise ValueError(f'Number of threads must be a positive integer or None; found {n_threads}'
+                         + ' instead')
+
+    options = {'method': simulation_method}
+    if n_threads is not None:
+        options['max_parallel_threads'] = n_threads
+    if n_experiments > 1:
+        options['max_parallel_experiments'] = 0
+    return options
@@ -0,0 +1,31 @@
+from qfactor.arithmetic import *
+
+
+def test_get_min_n_bits_for_modulus():
+    assert get_min_n_bits_for_modulus(1) == 1
+    assert get_min_n_bits_for_modulus(2) == 1
+    assert get_min_n_bits_for_modulus(3) == 2
+
+
+def test_get_min_n_bits_for_value():
+    assert get_min_n_bits_for_value(0) == 1
+    assert get_min_n_bits_for_value(1) == 1
+    assert get_min_n_bits_for_value(2) == 2
+
+
+def test_is_rotation_kept():
+    assert is_rotation_kept(5, None)
+    assert is_rotation_kept(2, 2)
+    assert not is_rotation_kept(3, 2)
+
+
+def test_get_modular_inverse():
+    assert get_modular_inverse(2, 5) == 3
+    assert get_modular_inverse(3, 5) == 2
+    assert get_modular_inverse(2, 7) == 4
+
+
+def test_get_lcm():
+    assert get_lcm(4, 6) == 12
+    assert get_lcm(3, 5) == 15
+    assert get_lcm(1, 7) == 7
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from qfactor.asynchronous import *
+from qfactor.backends import OrderFindingBackend
+from qfactor.cancellation import check_cancelled
+
+
+# Backend which never finds an order, checking for cancellation while it runs
+class SlowBackend(OrderFindingBackend):
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def get_order(self, x, n):
+        try:
+            while True:
+                check_cancelled()
+                time.sleep(0.01)
+        finally:
+            self.stopped.set()
+
+
+def test_factorize_async():
+    assert asyncio.run(factorize_async(15, backend='classical')) == (3, 5)
+    assert asyncio.run(factorize_async(7, backend='classical')) is None
+
+
+def test_get_order_async():
+    assert asyncio.run(get_order_async(7, 15, backend='classical')) == 4
+    assert asyncio.run(get_order_async(7, 15, backend='numpy', shots=4)) == 4
+
+
+def test_get_order_async_bad_timeout():
+    with pytest.raises(ValueError):
+        asyncio.run(get_order_async(7, 15, backend='classical', timeout=0))
+
+
+def test_get_order_async_timeout():
+    backend = SlowBackend()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(get_order_async(7, 15, backend, timeout=0.05))
+    assert backend.stopped.wait(1)
+
+
+def test_get_order_async_cancel():
+    backend = SlowBackend()
+
+    async def cancel():
+        task = asyncio.ensure_future(get_order_async(7, 15, backend))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+    assert backend.stopped.wait(1)
+
+
+def test_shutdown_executor():
+    assert get_executor() is get_executor()
+    executor = get_executor()
+    shutdown_executor()
+    assert get_executor() is not executor
@@ -0,0 +1,95 @@
+import math
+import pickle
+
+import pytest
+
+from qfactor.backends import *
+from qfactor.factoring import factorize, factorize_completely
+
+
+def test_find_order_classically_bad_value():
+    with pytest.raises(ValueError):
+        find_order_classically(2, 1)
+    with pytest.raises(ValueError):
+        find_order_classically(3, 15)
+    with pytest.raises(ValueError):
+        find_order_classically(2.5, 15)
+
+
+def test_find_order_classically():
+    assert find_order_classically(2, 3) == 2
+    assert find_order_classically(7, 15) == 4
+    assert find_order_classically(14, 15) == 2
+    assert find_order_classically(2, 21) == 6
+    for n in range(2, 200):
+        for x in range(1, n):
+            if math.gcd(x, n) == 1:
+                r = find_order_classically(x, n)
+                assert pow(x, r, n) == 1
+                assert all(pow(x, s, n) != 1 for s in range(1, r))
+
+
+def test_find_order_classically_large():
+    # 2 is a primitive root of the prime 1000003
+    assert find_order_classically(2, 1000003) == 1000002
+
+
+def test_get_backend_bad_value():
+    with pytest.raises(ValueError):
+        get_backend('asdf')
+    with pytest.raises(ValueError):
+        get_backend(ClassicalBackend(), shots=1)
+
+
+def test_get_backend():
+    assert isinstance(get_backend(), QiskitBackend)
+    assert isinstance(get_backend('aer'), QiskitBackend)
+    assert isinstance(get_backend('numpy'), NumpyBackend)
+    assert get_backend('numpy', shots=2).shots == 2
+    assert get_backend('aer', approximation_degree=3).approximation_degree == 3
+    assert get_backend('numpy', shots=2, approximation_degree=3).shots == 2
+    assert isinstance(get_backend('classical', simulation_method='statevector'),
+                      ClassicalBackend)
+    backend = ClassicalBackend()
+    assert get_backend(backend) is backend
+
+
+def test_backend_pickle():
+    backend = pickle.loads(pickle.dumps(QiskitBackend(shots=4, semiclassical=True)))
+    assert backend.shots == 4
+    assert backend.semiclassical
+    assert repr(NumpyBackend(2)) == 'NumpyBackend(shots=2, n_exponent_bits=None)'
+
+
+def test_classical_backend():
+    assert ClassicalBackend().get_order(7, 15) == 4
+
+
+def test_numpy_backend():
+    assert NumpyBackend().get_order(7, 15) == 4
+    assert NumpyBackend(n_exponent_bits=5).get_order(7, 15) == 4
+    with pytest.raises(ValueError):
+        NumpyBackend(shots=1, n_exponent_bits=6).get_order(3, 3233)
+
+
+def test_qiskit_backend():
+    assert QiskitBackend().get_order(7, 15) == 4
+
+
+def test_get_orders():
+    assert ClassicalBackend().get_orders([(7, 15), (2, 21)]) == [4, 6]
+    assert NumpyBackend().get_orders([(7, 15), (2, 21)]) == [4, 6]
+    assert QiskitBackend().get_orders([(7, 15), (2, 15)]) == [4, 4]
+
+
+def test_factorize_classical_backend():
+    assert factorize(15, backend='classical') == (3, 5)
+    assert factorize(1000003 * 1000033, backend='classical') == (1000003, 1000033)
+    factors = factorize_completely(3 * 5 * 7 * 11 * 13, backend=ClassicalBackend())
+    assert factors == [3, 5, 7, 11, 13]
+
+
+def test_factorize_simulation_options_ignored():
+    for backend in ('numpy', 'classical'):
+        assert factorize(15, backend=backend, approximation_degree=3) == (3, 5)
+        assert factorize(15, backend=backend, simulation_method='statevector') == (3, 5)
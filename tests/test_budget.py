@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+import qfactor
+from qfactor.budget import *
+from qfactor.shors_classical import run_shors_algorithm
+from qfactor.shors_quantum import get_order
+
+
+def test_Budget_bad_value():
+    with pytest.raises(ValueError):
+        Budget(max_seconds=0)
+    with pytest.raises(ValueError):
+        Budget(max_simulations=-1)
+    with pytest.raises(ValueError):
+        Budget(max_shots=1.5)
+    with pytest.raises(ValueError):
+        Budget(max_attempts=-1)
+
+
+def test_Budget_charge():
+    budget = Budget(max_simulations=2, max_shots=10, max_attempts=1)
+    budget.charge_attempt()
+    budget.charge_simulation(4)
+    with pytest.raises(BudgetExhausted):
+        budget.charge_attempt()
+    assert budget.exhausted_limit == 'attempts'
+    with pytest.raises(BudgetExhausted):
+        budget.charge_simulation(8)
+    budget.charge_simulation(6)
+    with pytest.raises(BudgetExhausted):
+        budget.charge_simulation(0)
+    report = budget.get_report()
+    assert report['exhausted']
+    assert report['exhausted_limit'] == 'attempts'
+    assert report['simulations'] == 2
+    assert report['shots'] == 10
+    assert report['attempts'] == 1
+
+
+def test_Budget_seconds():
+    budget = Budget(max_seconds=0.01)
+    budget.check()
+    assert budget.get_remaining_seconds() == 0.01
+    budget.start()
+    time.sleep(0.02)
+    assert budget.get_remaining_seconds() == 0
+    with pytest.raises(BudgetExhausted):
+        budget.check()
+    assert budget.exhausted_limit == 'seconds'
+
+
+def test_Budget_reserve():
+    budget = Budget(max_simulations=5, max_shots=100)
+    first = budget.reserve(2)
+    assert (first.max_simulations, first.max_shots) == (3, 50)
+    second = budget.reserve(1)
+    assert (second.max_simulations, second.max_shots) == (2, 50)
+    with pytest.raises(BudgetExhausted):
+        budget.reserve(1)
+    first.charge_simulation(8)
+    budget.release(first)
+    assert budget.simulations == 1
+    assert budget.shots == 8
+    third = budget.reserve(1)
+    assert (third.max_simulations, third.max_shots) == (2, 42)
+    assert Budget().reserve(2).max_simulations is None
+
+
+def test_budget_scope():
+    charge_attempt()
+    assert get_budget() is None
+    budget = Budget()
+    with budget_scope(budget):
+        assert get_budget() is budget
+        charge_attempt()
+        charge_simulation(8)
+    assert get_budget() is None
+    assert budget.attempts == 1
+    assert budget.shots == 8
+
+
+def test_get_order_budget():
+    with budget_scope(Budget(max_simulations=1)) as budget:
+        assert get_order(7, 15, simulator='numpy') == 4
+    assert budget.simulations == 1
+    assert budget.shots == 8
+    with budget_scope(Budget(max_shots=4)):
+        with pytest.raises(BudgetExhausted):
+            get_order(7, 15, simulator='numpy')
+
+
+def test_run_shors_algorithm_budget():
+    with budget_scope(Budget(max_attempts=3)) as budget:
+        assert run_shors_algorithm(7, 0.99, backend='classical') is None
+    assert budget.get_report()['exhausted_limit'] == 'attempts'
+    assert budget.attempts == 3
+    assert budget.confidence == 0.875
+
+
+def test_run_shors_algorithm_parallel_budget():
+    with budget_scope(Budget(max_attempts=3)) as budget:
+        assert run_shors_algorithm(7, 0.99, n_workers=2, backend='classical') is None
+    assert budget.is_exhausted()
+    assert budget.attempts == 3
+    assert budget.confidence == 0.875
+
+
+def test_run_shors_algorithm_parallel_simulation_budget():
+    with budget_scope(Budget(max_simulations=3)) as budget:
+        assert run_shors_algorithm(7, 0.99, n_workers=2, backend='numpy') is None
+    assert budget.get_report()['exhausted_limit'] == 'simulations'
+    assert 0 < budget.simulations <= 3
+    assert budget.shots == 8 * budget.simulations
+
+
+def test_factorize_budget():
+    budget = qfactor.Budget(max_attempts=0)
+    with pytest.raises(qfactor.BudgetExhausted) as info:
+        qfactor.factorize(15, backend='classical', budget=budget)
+    assert info.value.report['exhausted']
+    assert info.value.report['exhausted_limit'] == 'attempts'
+    assert info.value.report['attempts'] == 0
+    assert budget.is_exhausted()
+    budget = qfactor.Budget(max_attempts=10)
+    assert qfactor.factorize(15, backend='classical', budget=budget) == (3, 5)
+    assert not budget.is_exhausted()
+
+
+def test_factorize_completely_budget():
+    budget = qfactor.Budget(max_attempts=0)
+    with pytest.raises(qfactor.BudgetExhausted) as info:
+        qfactor.factorize_completely(60, backend='classical', budget=budget)
+    assert info.value.prime_factors == [2, 2]
+    assert info.value.composite_factors == [15]
+    assert info.value.report['exhausted']
+    assert budget.is_exhausted()
+    budget = qfactor.Budget(max_attempts=100)
+    assert qfactor.factorize_completely(60, backend='classical', budget=budget) == [2, 2, 3, 5]
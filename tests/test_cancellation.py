@@ -0,0 +1,82 @@
+import concurrent.futures
+import queue
+import time
+
+import pytest
+
+from qfactor.backends import ClassicalBackend
+from qfactor.cancellation import *
+from qfactor.shors_classical import run_shors_algorithm
+from qfactor.shors_quantum import get_order
+
+
+def test_cancellation_token_bad_value():
+    with pytest.raises(ValueError):
+        CancellationToken(0)
+    with pytest.raises(ValueError):
+        CancellationToken(-1)
+
+
+def test_cancellation_token_cancel():
+    token = CancellationToken()
+    token.check()
+    assert not token.is_cancelled()
+    token.cancel()
+    assert token.is_cancelled()
+    with pytest.raises(concurrent.futures.CancelledError):
+        token.check()
+
+
+def test_cancellation_token_deadline():
+    token = CancellationToken(0.01)
+    time.sleep(0.02)
+    assert token.is_expired()
+    with pytest.raises(TimeoutError):
+        token.check()
+
+
+def test_check_cancelled():
+    check_cancelled()
+    token = CancellationToken()
+    token.cancel()
+    with cancellation_scope(token):
+        assert get_cancellation_token() is token
+        with pytest.raises(concurrent.futures.CancelledError):
+            check_cancelled()
+    assert get_cancellation_token() is None
+    check_cancelled()
+
+
+def test_call_with_token():
+    token = CancellationToken()
+    assert call_with_token(token, get_cancellation_token) is token
+    token.cancel()
+    with pytest.raises(concurrent.futures.CancelledError):
+        call_with_token(token, get_cancellation_token)
+
+
+def test_get_from_queue():
+    items = queue.Queue()
+    items.put(1)
+    assert get_from_queue(items) == 1
+    token = CancellationToken()
+    token.cancel()
+    with cancellation_scope(token):
+        with pytest.raises(concurrent.futures.CancelledError):
+            get_from_queue(items)
+
+
+def test_get_order_cancelled():
+    token = CancellationToken()
+    token.cancel()
+    with cancellation_scope(token):
+        with pytest.raises(concurrent.futures.CancelledError):
+            get_order(7, 15, simulator='numpy')
+
+
+def test_run_shors_algorithm_cancelled():
+    token = CancellationToken()
+    token.cancel()
+    with cancellation_scope(token):
+        with pytest.raises(concurrent.futures.CancelledError):
+            run_shors_algorithm(15, 0.95, backend=ClassicalBackend())
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from qfactor.circuit_cache import *
+
+
+def test_CircuitCache_bad_size(tmp_path):
+    with pytest.raises(ValueError):
+        CircuitCache(str(tmp_path), -1)
+    with pytest.raises(ValueError):
+        CircuitCache(str(tmp_path), 0.5)
+
+
+def test_CircuitCache_miss(tmp_path):
+    cache = CircuitCache(str(tmp_path))
+    assert cache.get(('circuit', 2, 3)) is None
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_CircuitCache_hit(tmp_path):
+    cache = CircuitCache(str(tmp_path))
+    cache.put(('circuit', 2, 3), [1, 2, 3])
+    assert cache.get(('circuit', 2, 3)) == [1, 2, 3]
+    assert cache.get(('circuit', 2, 5)) is None
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_CircuitCache_persistent(tmp_path):
+    CircuitCache(str(tmp_path)).put(('circuit', 2, 3), 'value')
+    assert CircuitCache(str(tmp_path)).get(('circuit', 2, 3)) == 'value'
+
+
+def test_CircuitCache_eviction(tmp_path):
+    cache = CircuitCache(str(tmp_path))
+    cache.put(1, bytes(1000))
+    cache.max_size_bytes = 2500
+    cache.put(2, bytes(1000))
+    os.utime(cache._get_path(1), (0, 0))
+    os.utime(cache._get_path(2), (1, 1))
+    cache.get(1)
+    cache.put(3, bytes(1000))
+    assert cache.get(1) is not None
+    assert cache.get(2) is None
+    assert cache.get(3) is not None
+    assert cache.get_stats()['evictions'] == 1
+    assert cache.get_size() <= 2500
+
+
+def test_CircuitCache_corrupt_file(tmp_path):
+    cache = CircuitCache(str(tmp_path))
+    cache.put(1, 'value')
+    with open(cache._get_path(1), 'wb') as file:
+        file.write(b'not a pickle')
+    assert cache.get(1) is None
+    assert not os.path.exists(cache._get_path(1))
+
+
+def test_CircuitCache_clear(tmp_path):
+    cache = CircuitCache(str(tmp_path))
+    cache.put(1, 'value')
+    cache.clear()
+    assert cache.get_size() == 0
+    assert cache.get(1) is None
+
+
+def test_enable_circuit_cache(tmp_path):
+    cache = enable_circuit_cache(str(tmp_path), 1000)
+    assert get_circuit_cache() is cache
+    assert cache.max_size_bytes == 1000
+    disable_circuit_cache()
+    assert get_circuit_cache() is None
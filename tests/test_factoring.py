@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 import pytest
 
 from qfactor.factoring import *
@@ -22,6 +25,7 @@ def test_factorize_bad_value():
 def test_factorize_prime():
     assert factorize(2) is None
     assert factorize(3) is None
+    assert factorize(1000003) is None
 
 
 def test_factorize_composite_even():
@@ -38,6 +42,81 @@ def test_factorize_composite_odd_non_power():
     assert factorize(15) == (3, 5)
 
 
+def test_factorize_approximate():
+    assert factorize(15, approximation_degree=3) == (3, 5)
+
+
+def test_factorize_simulation_method():
+    assert factorize(15, simulation_method='matrix_product_state') == (3, 5)
+
+
+def test_factorize_classically():
+    assert factorize_classically(2) == (True, None)
+    assert factorize_classically(6) == (True, (2, 3))
+    assert factorize_classically(27) == (True, (3, 9))
+    assert factorize_classically(15) == (False, None)
+    with pytest.raises(ValueError):
+        factorize_classically(1)
+
+
+def test_factorize_completely_classical():
+    assert factorize_completely(2) == [2]
+    assert factorize_completely(97) == [97]
+    assert factorize_completely(64) == [2, 2, 2, 2, 2, 2]
+    assert factorize_completely(4 * 121) == [2, 2, 11, 11]
+    with pytest.raises(ValueError):
+        factorize_completely(1)
+
+
+def test_factorize_completely_many_factors():
+    assert factorize_completely(2 ** 1200) == [2] * 1200
+    assert factorize_completely(2 ** 600 * 3 ** 300) == [2] * 600 + [3] * 300
+
+
+def test_factorize_completely():
+    assert factorize_completely(2 * 15) == [2, 3, 5]
+    assert factorize_completely(4 * 15) == [2, 2, 3, 5]
+
+
+def test_factorize_many_classical():
+    results = list(factorize_many([4, 9, 4, 2, 27, 9]))
+    assert results == [(4, (2, 2)), (9, (3, 3)), (2, None), (27, (3, 9))]
+
+
+def test_factorize_many_lazy():
+    results = factorize_many(iter([4, 'asdf']))
+    assert next(results) == (4, (2, 2))
+    with pytest.raises(TypeError):
+        next(results)
+
+
+def test_factorize_many_bad_n_workers():
+    with pytest.raises(ValueError):
+        list(factorize_many([4], n_workers=0))
+
+
+def test_factorize_many():
+    assert list(factorize_many([15, 15, 3])) == [(15, (3, 5)), (3, None)]
+
+
+def test_factorize_many_parallel():
+    results = list(factorize_many([15, 4, 21, 15, 3], n_workers=2))
+    assert len(results) == 4
+    assert dict(results) == {15: (3, 5), 4: (2, 2), 21: (3, 7), 3: None}
+
+
+def test_factorize_composite_retried():
+    # A single failed attempt reaches the minimum confidence, but n is known to be composite
+    for i in range(20):
+        assert factorize(217, 0.5, backend='classical') == (7, 31)
+
+
+def test_factorize_many_parallel_composite_retried():
+    numbers = [217, 221, 247]
+    results = dict(factorize_many(numbers, 0.5, n_workers=2, backend='classical'))
+    assert results == {217: (7, 31), 221: (13, 17), 247: (13, 19)}
+
+
 def test_find_integer_root_bad_type():
     with pytest.raises(TypeError):
         find_integer_root('asdf')
@@ -58,3 +137,36 @@ def test_find_integer_root_good():
     assert find_integer_root(4) == 2
     assert find_integer_root(8) == 2
     assert find_integer_root(9) == 3
+    assert find_integer_root(64) == 8
+    assert find_integer_root(3 ** 5) == 3
+
+
+def test_find_integer_root_large():
+    assert find_integer_root(12345678901234567891 ** 3) == 12345678901234567891
+    assert find_integer_root(3 ** 401) == 3
+    assert find_integer_root(12345678901234567891 ** 3 + 1) is None
+    assert find_integer_root(2 ** 521 - 1) is None
+
+
+def test_find_integer_kth_root():
+    assert find_integer_kth_root(0, 2) == 0
+    assert find_integer_kth_root(1, 3) == 1
+    assert find_integer_kth_root(15, 2) == 3
+    assert find_integer_kth_root(16, 2) == 4
+    assert find_integer_kth_root(10 ** 60 - 1, 3) == 10 ** 20 - 1
+
+
+def test_get_primes():
+    assert get_primes(1) == []
+    assert get_primes(2) == [2]
+    assert get_primes(20) == [2, 3, 5, 7, 11, 13, 17, 19]
+
+
+def test_factorize_classical_paths_skip_qiskit():
+    # Run in a fresh interpreter, since other tests have already imported qiskit here
+    code = ('import sys; import qfactor;'
+            + ' assert qfactor.factorize(16) == (2, 8);'
+            + ' assert qfactor.factorize(27) == (3, 9);'
+            + ' assert qfactor.factorize(15, backend="classical") == (3, 5);'
+            + ' assert "qiskit" not in sys.modules')
+    subprocess.run([sys.executable, '-c', code], check=True)
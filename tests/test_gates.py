@@ -1,5 +1,6 @@
 import cmath
 
+import pytest
 import qiskit
 
 from qfactor.gates import *
@@ -15,18 +16,6 @@ def run(circuit):
     return statevector
 
 
-def test_get_min_n_bits_for_modulus():
-    assert get_min_n_bits_for_modulus(1) == 1
-    assert get_min_n_bits_for_modulus(2) == 1
-    assert get_min_n_bits_for_modulus(3) == 2
-
-
-def test_get_min_n_bits_for_value():
-    assert get_min_n_bits_for_value(0) == 1
-    assert get_min_n_bits_for_value(1) == 1
-    assert get_min_n_bits_for_value(2) == 2
-
-
 def test_initialize_to_value_1bit():
     qc = qiskit.QuantumCircuit(1)
     initialize_to_value(qc, 1)
@@ -39,6 +28,64 @@ def test_initialize_to_value_2bits():
     assert abs(run(qc)[2]) == 1
 
 
+def test_GateCache_hits_and_misses():
+    cache = GateCache()
+    gate = cache.get(QFT, 2)
+    assert cache.get(QFT, 2) is gate
+    assert cache.get(QFT, 3) is not gate
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['misses'] == 2
+    assert cache.get_stats()['size'] == 2
+
+
+def test_GateCache_derived_gates():
+    cache = GateCache()
+    inverse = cache.get(QFT, 2, inverse=True)
+    assert cache.get(QFT, 2, inverse=True) is inverse
+    assert cache.get(QFT, 2) is not inverse
+    assert cache.get(QFT, 2, n_controls=1).num_qubits == 3
+
+
+def test_GateCache_derived_gates_stats():
+    cache = GateCache()
+    cache.get(QFT, 2, inverse=True)
+    assert cache.get_stats()['misses'] == 1
+    assert cache.get_stats()['hits'] == 0
+    assert cache.get_stats()['size'] == 2
+    cache.get(QFT, 2)
+    cache.get(QFT, 2, n_controls=1)
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['misses'] == 2
+
+
+def test_GateCache_eviction():
+    cache = GateCache(2)
+    gate = cache.get(QFT, 1)
+    cache.get(QFT, 2)
+    cache.get(QFT, 1)
+    cache.get(QFT, 3)
+    assert cache.get_stats()['evictions'] == 1
+    assert cache.get(QFT, 1) is gate
+    cache.resize(0)
+    assert cache.get_stats()['size'] == 0
+    assert cache.get(QFT, 1) is not cache.get(QFT, 1)
+
+
+def test_GateCache_bad_size():
+    with pytest.raises(ValueError):
+        GateCache(-1)
+    with pytest.raises(ValueError):
+        GateCache(0.5)
+
+
+def test_GateCache_clear():
+    cache = GateCache()
+    cache.get(QFT, 1)
+    cache.clear()
+    assert cache.get_stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0,
+                                 'max_size': 1024}
+
+
 def test_Rk():
     qc = qiskit.QuantumCircuit(1)
     initialize_to_value(qc, 1)
@@ -101,6 +148,25 @@ def test_QFT_2bits():
     assert cmath.isclose(cmath.phase(statevector[3]), -math.pi / 2)
 
 
+def test_QFT_approximate_size():
+    assert len(QFT(4).data) == 12
+    assert len(QFT(4, 2).data) == 9
+    assert len(QFT(4, 4).data) == 12
+
+
+def test_QFT_approximate_exact_degree():
+    qc = qiskit.QuantumCircuit(3)
+    initialize_to_value(qc, 5)
+    qc.append(QFT(qc.num_qubits, 3), qc.qubits)
+    qc.append(QFT(qc.num_qubits).inverse(), qc.qubits)
+    assert cmath.isclose(abs(run(qc)[5]), 1)
+
+
+def test_FixedQFTAdder_approximate_size():
+    assert len(FixedQFTAdder(3, 1).data) == 3
+    assert len(FixedQFTAdder(3, 1, 1).data) == 1
+
+
 def test_FixedQFTAdder_1bit():
     qc = qiskit.QuantumCircuit(1)
     qc.append(QFT(qc.num_qubits), qc.qubits)
@@ -118,6 +184,40 @@ def test_FixedQFTAdder_2bits():
     assert abs(run(qc)[3]) == 1
 
 
+def test_FixedQFTAdder_subtract():
+    qc = qiskit.QuantumCircuit(2)
+    initialize_to_value(qc, 3)
+    qc.append(QFT(qc.num_qubits), qc.qubits)
+    qc.append(FixedQFTAdder(qc.num_qubits, 2, subtract=True), qc.qubits)
+    qc.append(QFT(qc.num_qubits).inverse(), qc.qubits)
+    assert abs(run(qc)[1]) == 1
+
+
+def test_FixedQFTAdder_controlled_size():
+    circuit = FixedQFTAdder(3, 1, n_controls=2)
+    assert circuit.num_qubits == 5
+    assert circuit.count_ops() == {'mcu1': 3}
+    assert FixedQFTAdder(3, 1, n_controls=1).count_ops() == {'cu1': 3}
+
+
+def test_FixedQFTAdder_control_off():
+    qc = qiskit.QuantumCircuit(3)
+    initialize_to_value(qc, 4)
+    qc.append(QFT(2), qc.qubits[1:])
+    qc.append(FixedQFTAdder(2, 1, n_controls=1), qc.qubits)
+    qc.append(QFT(2).inverse(), qc.qubits[1:])
+    assert abs(run(qc)[4]) == 1
+
+
+def test_FixedQFTAdder_control_on():
+    qc = qiskit.QuantumCircuit(3)
+    initialize_to_value(qc, 5)
+    qc.append(QFT(2), qc.qubits[1:])
+    qc.append(FixedQFTAdder(2, 1, n_controls=1), qc.qubits)
+    qc.append(QFT(2).inverse(), qc.qubits[1:])
+    assert abs(run(qc)[7]) == 1
+
+
 def test_CCModularFixedQFTAdder_control_off():
     qc = qiskit.QuantumCircuit(5)
     qc.append(QFT(2), qc.qubits[2:-1])
@@ -165,12 +265,6 @@ def test_CPartialModularFixedMultiplier_control_on():
     assert cmath.isclose(abs(run(qc)[37]), 1)
 
 
-def test_get_modular_inverse():
-    assert get_modular_inverse(2, 5) == 3
-    assert get_modular_inverse(3, 5) == 2
-    assert get_modular_inverse(2, 7) == 4
-
-
 def test_CModularFixedMultiplier_control_off():
     qc = qiskit.QuantumCircuit(7)
     qc.x(qc.qubits[1])
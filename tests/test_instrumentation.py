@@ -0,0 +1,55 @@
+import logging
+
+from qfactor.instrumentation import *
+
+
+def test_emit_without_listeners():
+    emit('event', value=1)
+
+
+def test_add_and_remove_listener():
+    events = []
+
+    def listener(event, data):
+        events.append((event, data))
+
+    add_listener(listener)
+    try:
+        emit('event', value=1)
+    finally:
+        remove_listener(listener)
+    emit('event', value=2)
+    assert events == [('event', {'value': 1})]
+
+
+def test_timed():
+    collector = MetricsCollector()
+    with timed('untimed'):
+        pass
+    add_listener(collector)
+    try:
+        with timed('timed', value=1):
+            pass
+    finally:
+        remove_listener(collector)
+    assert 'untimed' not in collector.counts
+    assert collector.counts['timed'] == 1
+    assert collector.durations['timed'] >= 0
+
+
+def test_LoggingListener(caplog):
+    listener = LoggingListener()
+    with caplog.at_level(logging.INFO, logger='qfactor'):
+        listener('event', {'x': 2, 'n': 3})
+    assert caplog.messages == ['event x=2 n=3']
+
+
+def test_MetricsCollector():
+    collector = MetricsCollector()
+    collector('event', {'duration': 1.5})
+    collector('event', {'duration': 0.5})
+    collector('other', {})
+    assert collector.get_summary() == {'event': {'count': 2, 'total_duration': 2.0},
+                                       'other': {'count': 1, 'total_duration': None}}
+    collector.clear()
+    assert collector.get_summary() == {}
@@ -0,0 +1,28 @@
+import fractions
+
+import pytest
+
+from qfactor.lattice import *
+
+
+def test_reduce_basis_bad_delta():
+    with pytest.raises(ValueError):
+        reduce_basis([[1, 0], [0, 1]], fractions.Fraction(1, 4))
+    with pytest.raises(ValueError):
+        reduce_basis([[1, 0], [0, 1]], 2)
+
+
+def test_reduce_basis():
+    assert reduce_basis([[1, 1, 1], [-1, 0, 2], [3, 5, 6]]) == [[0, 1, 0], [1, 0, 1], [-1, 0, 2]]
+    assert reduce_basis([[1, 0], [0, 1]]) == [[1, 0], [0, 1]]
+
+
+def test_reduce_basis_short_vector():
+    # (1, 0) = 1 * (4, 1) - 1 * (3, 1) is the shortest vector of the lattice
+    assert get_squared_norm(reduce_basis([[4, 1], [3, 1]])[0]) == 1
+
+
+def test_get_gram_schmidt():
+    orthogonal_basis, coefficients = get_gram_schmidt([[1, 0], [1, 1]])
+    assert orthogonal_basis == [[1, 0], [0, 1]]
+    assert coefficients[1][0] == 1
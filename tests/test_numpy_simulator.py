@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from qfactor.numpy_simulator import *
+
+
+def test_get_powers():
+    assert list(get_powers(7, 15, 6)) == [1, 7, 4, 13, 1, 7]
+    assert list(get_powers(2, 3, 1)) == [1]
+
+
+def test_get_c_distribution_not_coprime():
+    with pytest.raises(ValueError):
+        get_c_distribution(3, 15, 256)
+
+
+def test_get_c_distribution_exact_period():
+    distribution = get_c_distribution(7, 15, 256)
+    assert len(distribution) == 256
+    for c in range(256):
+        if c % 64 == 0:
+            assert math.isclose(distribution[c], 0.25)
+        else:
+            assert distribution[c] < 1e-12
+
+
+def test_get_c_distribution_inexact_period():
+    distribution = get_c_distribution(2, 21, 512)
+    assert math.isclose(distribution.sum(), 1)
+    assert math.isclose(distribution[0], (2 * 86 ** 2 + 4 * 85 ** 2) / 512 ** 2)
+    assert distribution.argmax() in (0, 85, 171, 256, 341, 427)
+
+
+def test_get_counts():
+    counts = get_counts(7, 15, 256, 100)
+    assert sum(counts.values()) == 100
+    assert set(counts) <= {0, 64, 128, 192}
@@ -0,0 +1,67 @@
+import math
+
+import qiskit
+
+from qfactor.gates import FixedQFTAdder, ModularFixedExponentiator, QFT
+from qfactor.optimization import *
+
+
+def test_is_zero_angle():
+    assert is_zero_angle(0)
+    assert is_zero_angle(2 * math.pi)
+    assert is_zero_angle(-2 * math.pi)
+    assert not is_zero_angle(math.pi / 2 ** 20)
+
+
+def test_flatten_circuit():
+    circuit = qiskit.QuantumCircuit(3)
+    circuit.append(QFT(2).to_gate(), [circuit.qubits[2], circuit.qubits[0]])
+    instructions = list(flatten_circuit(circuit))
+    names = [instruction.name for instruction, qargs, cargs in instructions]
+    assert names == ['h', 'cu1', 'h', 'swap']
+    assert instructions[0][1] == [circuit.qubits[0]]
+
+
+def test_optimize_circuit_self_inverse():
+    circuit = qiskit.QuantumCircuit(2)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.swap(0, 1)
+    circuit.swap(1, 0)
+    circuit.cx(0, 1)
+    circuit.cx(1, 0)
+    names = [instruction.name for instruction, qargs, cargs in optimize_circuit(circuit).data]
+    assert names == ['h', 'cx']
+
+
+def test_optimize_circuit_phase_gates():
+    circuit = qiskit.QuantumCircuit(2)
+    circuit.append(FixedQFTAdder(2, 3).to_gate(), circuit.qubits)
+    circuit.u1(0.5, 0)
+    circuit.append(FixedQFTAdder(2, 3, subtract=True).to_gate(), circuit.qubits)
+    optimized_circuit = optimize_circuit(circuit)
+    assert optimized_circuit.count_ops() == {'u1': 1}
+    assert math.isclose(optimized_circuit.data[0][0].params[0], 0.5)
+
+
+def test_optimize_circuit_phase_gates_blocked():
+    circuit = qiskit.QuantumCircuit(2)
+    circuit.u1(0.5, 0)
+    circuit.h(0)
+    circuit.u1(-0.5, 0)
+    assert optimize_circuit(circuit).size() == 3
+
+
+def test_optimize_circuit_qft_pair():
+    circuit = qiskit.QuantumCircuit(4)
+    circuit.x(0)
+    circuit.append(QFT(4, 3).to_gate().inverse(), circuit.qubits)
+    circuit.append(QFT(4, 3).to_gate(), circuit.qubits)
+    assert optimize_circuit(circuit).count_ops() == {'x': 1}
+
+
+def test_optimize_circuit_equivalent():
+    circuit = ModularFixedExponentiator(2, 2, 2, 3)
+    optimized_circuit = optimize_circuit(circuit)
+    operator = qiskit.quantum_info.Operator(circuit)
+    assert operator.equiv(qiskit.quantum_info.Operator(optimized_circuit))
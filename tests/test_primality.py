@@ -0,0 +1,50 @@
+import pytest
+
+from qfactor.primality import *
+
+
+def test_is_prime_bad_type():
+    with pytest.raises(TypeError):
+        is_prime('asdf')
+    with pytest.raises(TypeError):
+        is_prime(2.5)
+
+
+def test_is_prime_small():
+    primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47]
+    assert [n for n in range(-5, 50) if is_prime(n)] == primes
+
+
+def test_is_prime_pseudoprimes():
+    # Carmichael numbers and strong pseudoprimes to several small bases
+    assert not is_prime(561)
+    assert not is_prime(2047)
+    assert not is_prime(3215031751)
+    assert not is_prime(3825123056546413051)
+
+
+def test_is_prime_large():
+    assert is_prime(2 ** 61 - 1)
+    assert not is_prime((2 ** 61 - 1) * (2 ** 31 - 1))
+    assert is_prime(2 ** 89 - 1)
+    assert not is_prime(2 ** 89 + 1)
+    assert is_prime(2 ** 521 - 1)
+    assert not is_prime((2 ** 127 - 1) * (2 ** 89 - 1))
+    assert not is_prime((2 ** 127 - 1) ** 2)
+
+
+def test_is_strong_lucas_probable_prime():
+    primes = [p for p in range(7, 1000, 2) if all(p % q != 0 for q in range(3, p, 2))]
+    assert all(is_strong_lucas_probable_prime(p) for p in primes)
+    # Strong Lucas pseudoprimes, which are not strong probable primes to base 2
+    assert [m for m in range(7, 20000, 2)
+            if is_strong_lucas_probable_prime(m) and m not in primes and not is_prime(m)] == [
+                5459, 5777, 10877, 16109, 18971]
+    assert not is_strong_lucas_probable_prime(121)
+
+
+def test_get_jacobi_symbol():
+    assert get_jacobi_symbol(5, 7) == -1
+    assert get_jacobi_symbol(2, 7) == 1
+    assert get_jacobi_symbol(-7, 15) == 1
+    assert get_jacobi_symbol(3, 15) == 0
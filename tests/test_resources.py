@@ -0,0 +1,87 @@
+import pytest
+
+from qfactor.gates import FixedQFTAdder, QFT
+from qfactor.resources import *
+
+
+def test_estimate_resources_bad_value():
+    with pytest.raises(ValueError):
+        estimate_resources(2)
+    with pytest.raises(ValueError):
+        estimate_resources(15.5)
+    with pytest.raises(ValueError):
+        estimate_resources(15, 5)
+    with pytest.raises(ValueError):
+        estimate_resources(15, 15)
+    with pytest.raises(ValueError):
+        estimate_resources(15, approximation_degree=0)
+    with pytest.raises(ValueError):
+        estimate_resources(15, n_exponent_bits=0)
+    with pytest.raises(ValueError):
+        estimate_resources(15, n_exponent_bits=4)
+
+
+def test_estimate_resources():
+    resources = estimate_resources(15, 7)
+    assert resources['num_qubits'] == 18
+    assert resources['num_exponent_bits'] == 8
+    assert resources['statevector_bytes'] == 16 * 2 ** 18
+    assert resources['size'] == sum(resources['gate_counts'].values())
+    assert resources['gate_counts']['h'] >= 8
+    assert resources['gate_counts']['measure'] == 8
+    assert resources['gate_counts']['cswap'] == 8 * 4
+
+
+def test_estimate_resources_upper_bound():
+    exact = estimate_resources(15, 7)
+    bound = estimate_resources(15)
+    assert bound['size'] >= exact['size']
+    assert bound['depth'] >= exact['depth']
+
+
+def test_estimate_resources_semiclassical():
+    resources = estimate_resources(15, 7, semiclassical=True)
+    assert resources['num_qubits'] == 11
+    assert resources['gate_counts']['reset'] == 7
+    assert resources['gate_counts']['c_if_u1'] == 8 * 7 // 2
+    assert resources['gate_counts']['measure'] == 8
+
+
+def test_estimate_resources_approximate():
+    exact = estimate_resources(15, 7)
+    approximate = estimate_resources(15, 7, approximation_degree=2)
+    assert approximate['num_qubits'] == exact['num_qubits']
+    assert approximate['size'] < exact['size']
+
+
+def test_estimate_resources_large():
+    resources = estimate_resources(2 ** 127 - 1, 3, approximation_degree=20)
+    assert resources['num_qubits'] == 2 * 127 + 2 * 127 + 2
+
+
+def test_get_qft():
+    for n_qubits in range(1, 7):
+        for approximation_degree in [None, 1, 2, 3]:
+            counts, depth = get_qft(n_qubits, approximation_degree)
+            circuit = QFT(n_qubits, approximation_degree)
+            ops = circuit.count_ops()
+            assert counts['h'] == ops.get('h', 0)
+            assert counts['swap'] == ops.get('swap', 0)
+            assert counts['cu1'] == circuit.size() - ops.get('h', 0) - ops.get('swap', 0)
+            assert depth == circuit.depth()
+
+
+def test_get_n_adder_rotations():
+    assert get_n_adder_rotations(4, None) == 4
+    assert get_n_adder_rotations(4, 0) == 0
+    for c in range(16):
+        for approximation_degree in [None, 1, 2, 3]:
+            circuit = FixedQFTAdder(4, c, approximation_degree)
+            assert get_n_adder_rotations(4, c, approximation_degree) == circuit.size()
+
+
+def test_estimate_resources_reduced_exponent_register():
+    resources = estimate_resources(15, 7, n_exponent_bits=5)
+    assert resources['num_qubits'] == 15
+    assert resources['num_exponent_bits'] == 5
+    assert resources['gate_counts']['cswap'] == 5 * 4
@@ -0,0 +1,137 @@
+import multiprocessing
+
+import pytest
+
+import qfactor
+from qfactor import result_cache
+from qfactor.result_cache import *
+from qfactor.shors_quantum import get_order
+
+
+def test_ResultCache_bad_size(tmp_path):
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path / 'results.sqlite3'), -1)
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path / 'results.sqlite3'), 0.5)
+
+
+def test_ResultCache_miss(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    assert cache.get_factors(15) is None
+    assert cache.get_order(7, 15) is None
+    assert cache.get_stats()['misses'] == 2
+
+
+def test_ResultCache_hit(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    cache.put_factors(15, (3, 5))
+    cache.put_order(7, 15, 4)
+    assert cache.get_factors(15) == (3, 5)
+    assert cache.get_order(7, 15) == 4
+    assert cache.get_order(2, 15) is None
+    assert cache.get_stats()['hits'] == 2
+    assert cache.get_size() == 2
+
+
+def test_ResultCache_large_integers(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    p = 2 ** 127 - 1
+    q = 2 ** 89 - 1
+    cache.put_factors(p * q, (q, p))
+    assert ResultCache(str(tmp_path / 'results.sqlite3')).get_factors(p * q) == (q, p)
+
+
+def test_ResultCache_persistent(tmp_path):
+    ResultCache(str(tmp_path / 'results.sqlite3')).put_order(7, 15, 4)
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    assert cache.get_order(7, 15) == 4
+    assert cache.get_stats()['memory_hits'] == 0
+    assert cache.get_order(7, 15) == 4
+    assert cache.get_stats()['memory_hits'] == 1
+
+
+def test_ResultCache_memory_limit(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'), 2)
+    cache.put_order(2, 15, 4)
+    cache.put_order(7, 15, 4)
+    assert cache.get_order(2, 15) == 4
+    cache.put_order(8, 15, 4)
+    assert cache.get_stats()['memory_entries'] == 2
+    assert cache.get_order(7, 15) == 4
+    assert cache.get_stats()['memory_hits'] == 1
+
+
+def test_ResultCache_version(tmp_path, monkeypatch):
+    ResultCache(str(tmp_path / 'results.sqlite3')).put_order(7, 15, 4)
+    monkeypatch.setattr(result_cache, '__version__', 'other')
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    assert cache.get_order(7, 15) is None
+    assert cache.get_size() == 0
+
+
+def test_ResultCache_clear(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    cache.put_order(7, 15, 4)
+    cache.clear()
+    assert cache.get_order(7, 15) is None
+    assert cache.get_size() == 0
+
+
+def put_orders(path, x_values):
+    cache = ResultCache(path)
+    for x in x_values:
+        cache.put_order(x, 1009, x)
+
+
+def test_ResultCache_processes(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    ResultCache(path)
+    with multiprocessing.get_context('spawn').Pool(2) as pool:
+        pool.starmap(put_orders, [(path, range(2, 100)), (path, range(100, 200))])
+    assert ResultCache(path).get_size() == 198
+
+
+def test_enable_result_cache(tmp_path):
+    cache = qfactor.enable_result_cache(str(tmp_path / 'results.sqlite3'))
+    try:
+        assert get_result_cache() is cache
+    finally:
+        qfactor.disable_result_cache()
+    assert get_result_cache() is None
+
+
+def test_factorize_result_cache(tmp_path):
+    cache = qfactor.enable_result_cache(str(tmp_path / 'results.sqlite3'))
+    try:
+        assert qfactor.factorize(15, backend='classical') == (3, 5)
+        assert cache.get_factors(15) == (3, 5)
+        cache.put_factors(21, (3, 7))
+        assert qfactor.factorize(21, backend=None) == (3, 7)
+        assert qfactor.factorize_completely(21, backend=None) == [3, 7]
+    finally:
+        qfactor.disable_result_cache()
+
+
+def test_get_order_result_cache(tmp_path):
+    cache = qfactor.enable_result_cache(str(tmp_path / 'results.sqlite3'))
+    try:
+        assert get_order(7, 15, simulator='numpy') == 4
+        assert cache.get_order(7, 15) == 4
+        cache.put_order(2, 21, 6)
+        assert get_order(2, 21) == 6
+    finally:
+        qfactor.disable_result_cache()
+
+
+def test_factorize_many_parallel_result_cache(tmp_path):
+    cache = qfactor.enable_result_cache(str(tmp_path / 'results.sqlite3'))
+    numbers = [13 * 17, 13 * 19, 13 * 23, 17 * 19]
+    try:
+        results = dict(qfactor.factorize_many(numbers, n_workers=2, backend='numpy'))
+    finally:
+        qfactor.disable_result_cache()
+    for n in numbers:
+        if results[n] is not None:
+            assert cache.get_factors(n) == results[n]
+    # Orders found in the workers are stored as well (unless every x shared a factor with n)
+    assert cache.get_size() > len([n for n in numbers if results[n] is not None])
@@ -1,6 +1,9 @@
 import pytest
 
+from qfactor.circuit_cache import disable_circuit_cache, enable_circuit_cache, get_circuit_cache
+from qfactor.result_cache import disable_result_cache, enable_result_cache
 from qfactor.shors_classical import *
+from qfactor.shors_quantum import get_order
 
 
 def test_shors_algorithm_bad_type():
@@ -25,6 +28,31 @@ def test_shors_algorithm_composite():
     assert run_shors_algorithm(15, 1) == (3, 5)
 
 
+def test_shors_algorithm_bad_n_workers():
+    with pytest.raises(ValueError):
+        run_shors_algorithm(15, 0.5, n_workers=0)
+    with pytest.raises(ValueError):
+        run_shors_algorithm(15, 0.5, n_workers=1.5)
+
+
+def test_shors_algorithm_parallel_prime():
+    assert run_shors_algorithm(3, 0.95, n_workers=2) is None
+
+
+def test_shors_algorithm_parallel_composite():
+    assert run_shors_algorithm(15, 1, n_workers=2) == (3, 5)
+
+
+def test_attempt_factorization_shared_factor():
+    assert attempt_factorization(3, 15) == (3, 5)
+    assert attempt_factorization(10, 15) == (3, 5)
+
+
+def test_attempt_factorization_order():
+    assert attempt_factorization(7, 15) == (3, 5)
+    assert attempt_factorization(14, 15) is None
+
+
 def test_primality_confidence_bad_type():
     with pytest.raises(TypeError):
         calculate_new_primality_confidence('asdf')
@@ -41,3 +69,61 @@ def test_primality_confidence_good():
     assert calculate_new_primality_confidence(0) == 0.5
     assert calculate_new_primality_confidence(0.5) == 0.75
     assert calculate_new_primality_confidence(0.75) == 0.875
+
+
+def test_shors_algorithm_backend():
+    assert run_shors_algorithm(15, 1, backend='classical') == (3, 5)
+    assert run_shors_algorithm(21, 1, backend='numpy') == (3, 7)
+
+
+def test_shors_algorithm_parallel_backend():
+    assert run_shors_algorithm(15, 1, n_workers=2, backend='classical') == (3, 5)
+
+
+def test_shors_algorithm_bad_backend():
+    with pytest.raises(ValueError):
+        run_shors_algorithm(15, 1, backend='asdf')
+
+
+def test_shors_algorithm_bad_batch_size():
+    with pytest.raises(ValueError):
+        run_shors_algorithm(15, 1, backend='numpy', batch_size=0)
+    with pytest.raises(ValueError):
+        run_shors_algorithm(15, 1, backend='numpy', batch_size=1.5)
+
+
+def test_shors_algorithm_batch_size():
+    assert run_shors_algorithm(15, 1, backend='numpy', batch_size=4) == (3, 5)
+    assert run_shors_algorithm(7, 0.99, backend='numpy', batch_size=4) is None
+
+
+def test_attempt_factorizations():
+    assert attempt_factorizations([7, 14, 3], 15, 'classical') == [(3, 5), None, (3, 5)]
+
+
+def test_attempt_factorization_backend():
+    assert attempt_factorization(7, 15, 'classical') == (3, 5)
+    assert attempt_factorization(14, 15, 'classical') is None
+
+
+def test_create_pool_circuit_cache(tmp_path):
+    with create_pool(1) as pool:
+        assert pool.apply(get_circuit_cache) is None
+    enable_circuit_cache(str(tmp_path), 1000)
+    try:
+        with create_pool(1) as pool:
+            cache = pool.apply(get_circuit_cache)
+    finally:
+        disable_circuit_cache()
+    assert cache.directory == str(tmp_path)
+    assert cache.max_size_bytes == 1000
+
+
+def test_create_pool_result_cache(tmp_path):
+    cache = enable_result_cache(str(tmp_path / 'results.sqlite3'))
+    try:
+        with create_pool(1) as pool:
+            assert pool.apply(get_order, (7, 15), {'simulator': 'numpy'}) == 4
+    finally:
+        disable_result_cache()
+    assert cache.get_order(7, 15) == 4
@@ -1,5 +1,8 @@
 import pytest
+import qiskit
 
+import qfactor
+from qfactor import instrumentation
 from qfactor.shors_quantum import *
 
 
@@ -33,6 +36,189 @@ def test_get_order_good():
     assert get_order(7, 15) == 4
 
 
+def test_get_order_bad_shots():
+    with pytest.raises(ValueError):
+        get_order(7, 15, 0)
+    with pytest.raises(ValueError):
+        get_order(7, 15, 1.5)
+
+
+def test_get_order_shots():
+    assert get_order(7, 15, 1) == 4
+    assert get_order(7, 15, 32) == 4
+
+
+def test_get_order_bad_simulator():
+    with pytest.raises(ValueError):
+        get_order(7, 15, simulator='asdf')
+
+
+def test_get_order_numpy():
+    assert get_order(2, 3, simulator='numpy') == 2
+    assert get_order(7, 15, simulator='numpy') == 4
+
+
+def test_get_order_instrumentation():
+    collector = instrumentation.MetricsCollector()
+    instrumentation.add_listener(collector)
+    try:
+        assert get_order(7, 15, simulator='numpy') == 4
+    finally:
+        instrumentation.remove_listener(collector)
+    assert collector.counts['order_finding_started'] == 1
+    assert collector.counts['order_found'] == 1
+    assert collector.counts['circuit_simulated'] >= 1
+    assert collector.durations['circuit_simulated'] > 0
+
+
+def test_get_order_divisor_candidate():
+    # For x = 7 and n = 15, c = 128 gives the candidate 2, which only divides the order 4.
+    # The order should still be found from every nonzero c without simulating the circuit again.
+    measured = []
+
+    def listener(event, data):
+        if event == 'c_measured':
+            measured.append(data['c'])
+
+    instrumentation.add_listener(listener)
+    try:
+        for i in range(10):
+            assert get_order(7, 15, shots=1, simulator='numpy') == 4
+    finally:
+        instrumentation.remove_listener(listener)
+    assert len([c for c in measured if c != 0]) == 10
+
+
+def test_get_order_candidates():
+    assert list(get_order_candidates(4, 1, 15)) == [4, 8, 12]
+    assert list(get_order_candidates(2, 3, 15)) == [2, 6, 4, 12, 8, 10]
+
+
+def test_reduce_order():
+    assert reduce_order(7, 15, 4) == 4
+    assert reduce_order(7, 15, 12) == 4
+    assert reduce_order(2, 21, 36) == 6
+
+
+def test_get_order_bad_n_exponent_bits():
+    with pytest.raises(ValueError):
+        get_order(7, 15, n_exponent_bits=0)
+    with pytest.raises(ValueError):
+        get_order(7, 15, n_exponent_bits=1.5)
+    with pytest.raises(ValueError):
+        get_order(7, 15, simulator='numpy', n_exponent_bits=4)
+    with pytest.raises(ValueError):
+        get_orders([(7, 15), (3, 3233)], simulator='numpy', n_exponent_bits=6)
+
+
+def test_get_order_reduced_exponent_register():
+    assert get_order(7, 15, simulator='numpy', n_exponent_bits=5) == 4
+    assert get_order(2, 21, simulator='numpy', n_exponent_bits=6) == 6
+
+
+def test_get_lattice_candidates():
+    # For x = 7 and n = 15 with q = 32, the measured values are multiples of 32 / 4 = 8
+    assert get_lattice_candidates([8], 32, 15) == []
+    assert 4 in get_lattice_candidates([8, 24], 32, 15)
+    assert all(0 < r < 15 for r in get_lattice_candidates([8, 24, 16], 32, 15))
+
+
+def test_get_c_values_numpy():
+    values = get_c_values(7, 15, 256, 64, 'numpy')
+    assert len(values) == len(set(values))
+    assert set(values) <= {0, 64, 128, 192}
+
+
+def test_get_c_value_batches_numpy():
+    batches = get_c_value_batches([(7, 15, 256), (2, 21, 512)], 64, 'numpy')
+    assert len(batches) == 2
+    assert set(batches[0]) <= {0, 64, 128, 192}
+    assert all(0 <= c < 512 for c in batches[1])
+
+
+def test_get_orders_numpy():
+    assert get_orders([(7, 15), (2, 15), (7, 15), (2, 21)], simulator='numpy') == [4, 4, 4, 6]
+    assert get_orders([], simulator='numpy') == []
+
+
+def test_get_orders_bad_value():
+    with pytest.raises(ValueError):
+        get_orders([(7, 15), (1, 15)], simulator='numpy')
+
+
+def test_get_orders():
+    assert get_orders([(7, 15), (2, 15), (4, 15)]) == [4, 4, 2]
+
+
+def test_get_order_bad_approximation_degree():
+    with pytest.raises(ValueError):
+        get_order(7, 15, approximation_degree=0)
+    with pytest.raises(ValueError):
+        get_order(7, 15, approximation_degree=1.5)
+
+
+def test_get_order_approximate():
+    assert get_order(7, 15, approximation_degree=8) == 4
+    assert get_order(7, 15, approximation_degree=3) == 4
+
+
+def test_get_order_bad_simulation_method():
+    with pytest.raises(ValueError):
+        get_order(7, 15, simulation_method='asdf')
+    with pytest.raises(ValueError):
+        get_order(7, 15, n_threads=0)
+
+
+def test_get_order_simulation_method():
+    assert get_order(7, 15, simulation_method='matrix_product_state') == 4
+    assert get_order(7, 15, simulation_method='statevector', n_threads=1) == 4
+
+
+def test_get_transpiled_circuit_simulation_method():
+    backend = qiskit.Aer.get_backend('qasm_simulator')
+    circuit = get_transpiled_circuit(7, 15, 32, backend, simulation_method='matrix_product_state')
+    assert set(circuit.count_ops()) <= {'u1', 'u2', 'u3', 'cx', 'measure', 'barrier'}
+
+
+def test_get_order_semiclassical():
+    assert get_order(2, 3, semiclassical=True) == 2
+    assert get_order(7, 15, semiclassical=True) == 4
+
+
+def test_build_circuit():
+    assert build_circuit(7, 15, 256).num_qubits == 8 + 4 + 6
+
+
+def test_build_semiclassical_circuit():
+    assert build_semiclassical_circuit(7, 15, 256).num_qubits == 2 * 4 + 3
+
+
+def test_get_num_qubits():
+    assert get_num_qubits(15, 256) == build_circuit(7, 15, 256).num_qubits
+    assert get_num_qubits(15, 256, True) == 2 * 4 + 3
+
+
+def test_get_c_values_semiclassical():
+    values = get_c_values(7, 15, 256, 64, semiclassical=True)
+    assert set(values) <= {0, 64, 128, 192}
+
+
+def test_get_order_circuit_cache(tmp_path):
+    cache = qfactor.enable_circuit_cache(str(tmp_path))
+    try:
+        assert get_order(7, 15) == 4
+        assert get_order(7, 15) == 4
+        assert cache.get_stats()['hits'] > 0
+    finally:
+        qfactor.disable_circuit_cache()
+
+
+def test_get_c_values():
+    values = get_c_values(7, 15, 256, 64)
+    assert len(values) == len(set(values))
+    assert set(values) <= {0, 64, 128, 192}
+
+
 def test_get_q_bad_type():
     with pytest.raises(TypeError):
         get_q('asdf')
@@ -43,6 +229,42 @@ def test_get_q_good():
     assert get_q(15) == 256
 
 
+def test_get_convergents_bad_value():
+    with pytest.raises(ValueError):
+        list(get_convergents(-1, 2))
+    with pytest.raises(ValueError):
+        list(get_convergents(1, 0))
+    with pytest.raises(ValueError):
+        list(get_convergents(0.5, 2))
+
+
+def test_get_convergents():
+    assert list(get_convergents(0, 5)) == [(0, 1)]
+    assert list(get_convergents(3, 7)) == [(0, 1), (1, 2), (3, 7)]
+    assert list(get_convergents(415, 93)) == [(4, 1), (9, 2), (58, 13), (415, 93)]
+
+
+def test_find_best_fraction_bad_value():
+    with pytest.raises(ValueError):
+        find_best_fraction(1, 2, 0)
+
+
+def test_find_best_fraction():
+    assert find_best_fraction(3, 7, 7) == (3, 7)
+    assert find_best_fraction(3, 7, 6) == (2, 5)
+    assert find_best_fraction(0, 7, 6) == (0, 1)
+    # 1/3 + 2**-200 is only distinguishable from 1/3 with exact arithmetic
+    q = 2 ** 200
+    c = q // 3 + 1
+    assert find_best_fraction(c, q, 1000) == (1, 3)
+    assert find_best_fraction(c, q, q)[1] > 1000
+
+
+def test_find_best_fraction_semiconvergent():
+    # The convergents of 1/3 are 0/1 and 1/3, but 1/2 is closer than 0/1
+    assert find_best_fraction(1, 3, 2) == (1, 2)
+
+
 def test_find_nearest_fraction_bad_type():
     with pytest.raises(TypeError):
         find_nearest_fraction('asdf', 1)
@@ -64,6 +286,7 @@ def test_find_nearest_fraction_bad_value():
 def test_find_nearest_fraction():
     assert find_nearest_fraction(0.4, 2) == (1, 2)
     assert find_nearest_fraction(0.6, 3) == (2, 3)
+    assert find_nearest_fraction(0, 3) == (0, 1)
 
 
 def test_get_fraction_bad_size():
@@ -0,0 +1,45 @@
+import pytest
+
+from qfactor.simulation import *
+
+
+def test_get_simulation_method_bad_value():
+    with pytest.raises(ValueError):
+        get_simulation_method(10, 'asdf')
+
+
+def test_get_simulation_method_override():
+    assert get_simulation_method(10, 'matrix_product_state') == 'matrix_product_state'
+    assert get_simulation_method(40, 'statevector') == 'statevector'
+
+
+def test_get_simulation_method():
+    assert get_simulation_method(10, available_memory=2 ** 30) == 'statevector'
+    assert get_simulation_method(26, available_memory=2 ** 31) == 'statevector'
+    assert get_simulation_method(27, available_memory=2 ** 31) == 'matrix_product_state'
+    assert get_simulation_method(60) == 'matrix_product_state'
+
+
+def test_get_available_memory():
+    available_memory = get_available_memory()
+    assert available_memory is None or available_memory > 0
+
+
+def test_get_basis_gates():
+    assert get_basis_gates('statevector') is None
+    assert get_basis_gates('matrix_product_state') == ['u1', 'u2', 'u3', 'cx']
+
+
+def test_get_run_options_bad_value():
+    with pytest.raises(ValueError):
+        get_run_options('statevector', 0)
+    with pytest.raises(ValueError):
+        get_run_options('statevector', 1.5)
+
+
+def test_get_run_options():
+    assert get_run_options('statevector') == {'method': 'statevector'}
+    assert get_run_options('matrix_product_state', 2) == {'method': 'matrix_product_state',
+                                                          'max_parallel_threads': 2}
+    assert get_run_options('statevector', n_experiments=3) == {'method': 'statevector',
+                                                               'max_parallel_experiments': 0}